@@ -1,12 +1,28 @@
+import warnings
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, confusion_matrix
-from sklearn.model_selection import cross_val_score
+from covid_analyzer.analysis import COUNT, aggregate_top_n, box_statistics, correlation, group_by, high_correlations
+from covid_analyzer.cache import DatasetCache, cache_key, content_hash
+from covid_analyzer.correlation import METHODS as CORRELATION_METHODS
+from covid_analyzer.cube import PrevalenceCube, has_cube_columns
+from covid_analyzer.dates import BUCKETS, build_time_indexes
+from covid_analyzer.downsample import MAX_LINE_POINTS, MAX_SCATTER_POINTS, WEBGL_THRESHOLD, downsample_line, downsample_scatter
+from covid_analyzer.features import HASHING, ONEHOT, EncodingConfig, prepare_features
+from covid_analyzer.figures import FigureCache, figure_key
+from covid_analyzer.filters import DROP as DROP_MISSING, KEEP as KEEP_MISSING, FilterIndex, NullBitmaps, select_rows
+from covid_analyzer.groupby import GroupByEngine, aggregations_for
+from covid_analyzer.ingest import DEFAULT_CHUNKSIZE, load_dataset
+from covid_analyzer.lineages import LineageTrie
+from covid_analyzer.profiling import Profiler
+from covid_analyzer.registry import ModelRegistry
+from covid_analyzer.schema import NCBI_SCHEMA
+from covid_analyzer.summary import profile_frame
+from covid_analyzer.table import TableView
+from covid_analyzer.training import DROP as DROP_RARE, GROUP, MERGE, cross_validate_forest, train_forest
 
 #happens
 
@@ -18,61 +34,260 @@ import os
 # Disable Arrow optimization to avoid serialization issues
 os.environ["STREAMLIT_SERVER_HEADLESS"] = "true"
 
-# Cache data loading
-@st.cache_data
-def load_data(file):
+# On-disk cache of cleaned datasets, shared across restarts and workers
+dataset_cache = DatasetCache()
+# Per-fold cross-validation results live next to it
+cv_cache_dir = os.path.join(os.path.dirname(dataset_cache.root), "cv")
+# Every trained model is saved here so it survives restarts
+model_registry = ModelRegistry()
+# Stage timings of this rerun (the script runs top to bottom on every interaction)
+profiler = Profiler()
+
+def get_dataset_key(file):
+    """Content hash of an upload, computed once per file instead of on every rerun"""
+    keys = st.session_state.setdefault("dataset_keys", {})
+    file_id = getattr(file, "file_id", None) or (file.name, file.size)
+    if file_id not in keys:
+        keys[file_id] = content_hash(file)
+    return keys[file_id]
+
+# Cache data loading; one frame per dataset is shared by reruns, sessions and the
+# dataset_key-keyed resources below instead of being unpickled for each of them.
+# Nothing may modify the returned frame in place; derive new frames instead.
+@st.cache_resource(max_entries=4)
+def load_data(_file, dataset_key, parallel=False, streaming=False, chunksize=DEFAULT_CHUNKSIZE, nrows=None,
+              use_disk_cache=True):
+    # The upload itself is not hashed by Streamlit (leading underscore); dataset_key identifies it
     try:
-        if file.name.endswith('csv'):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file)
+        if use_disk_cache:
+            df = dataset_cache.get(dataset_key)
+            if df is not None:
+                return df
         
-        # Clean data types for Streamlit compatibility
-        df = clean_dataframe_for_streamlit(df)
-        return df
+        df = parse_upload(_file, parallel=parallel, streaming=streaming, chunksize=chunksize, nrows=nrows)
     except Exception as e:
         st.error(f"Error loading file: {str(e)}")
         return None
+    if use_disk_cache and df is not None:
+        # Write failures only warn; the parsed frame is returned either way
+        dataset_cache.put(dataset_key, df, name=_file.name)
+    return df
 
-def clean_dataframe_for_streamlit(df):
-    """Clean dataframe to be compatible with Streamlit's Arrow serialization"""
-    try:
-        # Create a copy to avoid modifying original
-        df_clean = df.copy()
-        
-        # Handle object columns that might cause Arrow serialization issues
-        for col in df_clean.columns:
-            if df_clean[col].dtype == 'object':
-                # Replace NaN values first
-                df_clean[col] = df_clean[col].fillna('')
-                
-                # Convert to string, handling special cases
-                df_clean[col] = df_clean[col].astype(str)
-                
-                # Clean up common problematic values
-                df_clean[col] = df_clean[col].replace(['nan', 'None', 'null'], '')
-                
-                # Try to convert back to numeric if the data looks numeric
-                try:
-                    # Check if column can be converted to numeric
-                    numeric_series = pd.to_numeric(df_clean[col], errors='coerce')
-                    if not numeric_series.isna().all():
-                        df_clean[col] = numeric_series
-                except:
-                    # Keep as string if conversion fails
-                    pass
-        
-        # Ensure all columns have proper dtypes
-        for col in df_clean.columns:
-            if df_clean[col].dtype == 'object':
-                # Final cleanup for remaining object columns
-                df_clean[col] = df_clean[col].astype(str)
-        
-        return df_clean
-    except Exception as e:
-        st.warning(f"Data cleaning warning: {str(e)}")
-        # Return original dataframe if cleaning fails
-        return df
+# Sorted date indexes, built once per dataset
+@st.cache_resource(max_entries=4)
+def get_time_indexes(dataset_key, _df):
+    return build_time_indexes(_df)
+
+def parse_upload(file, parallel=False, streaming=False, chunksize=DEFAULT_CHUNKSIZE, nrows=None):
+    """Parse and clean an uploaded CSV/Excel file"""
+    progress_bar = None
+    on_chunk = None
+    if file.name.endswith('csv') and streaming:
+        # Read and clean in fixed-size chunks so memory stays near the final size
+        progress_bar = st.progress(0.0, text="Loading dataset...")
+        def on_chunk(fraction, rows):
+            progress_bar.progress(fraction if fraction is not None else 0.0, text=f"Loaded {rows:,} rows...")
+    
+    # Columns are classified once from a sample and converted exactly once
+    # to numeric, date, categorical or string (in place, no full copy)
+    with warnings.catch_warnings(record=True) as caught:
+        # Dates that did not parse are reported instead of silently becoming missing
+        warnings.simplefilter("always", UserWarning)
+        df = load_dataset(file, streaming=streaming, chunksize=chunksize, nrows=nrows, parallel=parallel,
+                          schema=NCBI_SCHEMA, progress=on_chunk)
+    if progress_bar is not None:
+        progress_bar.empty()
+    for warning in caught:
+        st.warning(str(warning.message))
+    return df
+
+# Feature matrix and train/test split, built once per (dataset, encoding config)
+@st.cache_resource(max_entries=4, show_spinner="Encoding features...")
+def get_features(dataset_key, config, _df, target="Pangolin"):
+    return prepare_features(_df, target=target, config=config)
+
+# Feature encoding options shared by the model pages
+def encoding_controls(key="features"):
+    with st.expander("🧮 Feature Encoding"):
+        col1, col2 = st.columns(2)
+        with col1:
+            method = st.selectbox("Categorical encoding", ["Sparse one-hot", "Feature hashing"], key=f"{key}_method")
+            min_frequency = st.number_input("Bucket categories rarer than", min_value=1, value=5, key=f"{key}_minfreq",
+                                            help="Categories with fewer rows are merged into one 'other' bucket")
+        with col2:
+            hash_width = st.select_slider("Hash width", options=[2 ** i for i in range(8, 21)], value=2 ** 12,
+                                          key=f"{key}_width", disabled=method != "Feature hashing")
+            drop_identifiers = st.checkbox("Drop identifier-like columns", value=True, key=f"{key}_dropids")
+    return EncodingConfig(method=HASHING if method == "Feature hashing" else ONEHOT, hash_width=hash_width,
+                          min_frequency=int(min_frequency), drop_identifiers=drop_identifiers)
+
+def show_encoding_report(report):
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Feature Matrix", f"{report['shape'][0]:,} × {report['shape'][1]:,}")
+    col2.metric("Matrix Memory", f"{report['nbytes'] / 2**20:.1f} MB",
+                delta=f"-{max(report['dense_nbytes'] - report['nbytes'], 0) / 2**20:.1f} MB vs dense", delta_color="off")
+    col3.metric("Build Time", f"{report['seconds']:.2f} s")
+    if report.get("missing_target"):
+        st.caption(f"Left out {report['missing_target']:,} rows without a {report['schema']['target']} value")
+    if report["dropped"]:
+        st.caption("Dropped columns: " + ", ".join(f"{col} ({reason})" for col, reason in report["dropped"].items()))
+
+# Sort orders and filter masks of the uploaded frame, kept on the server
+@st.cache_resource(max_entries=4)
+def get_table_view(dataset_key, _df):
+    return TableView(_df)
+
+# Serialized Plotly figures shared by all sessions, bounded by COVID_ANALYZER_FIGURE_CACHE_MB
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
+
+def cached_figure(key, build, stage):
+    """Show the figure cached under ``key``, calling ``build()`` -> (figure, caption) on a miss"""
+    with profiler.stage(f"build {stage}"):
+        fig, note = get_figure_cache().get_or_build(key, build)
+    if note:
+        st.caption(note)
+    if fig is not None:
+        with profiler.stage(f"render {stage}", payload=fig):
+            st.plotly_chart(fig)
+    return fig
+
+# Group-by engine per dataset (and row count, since missing rows can be dropped); it memoizes
+# groupings and aggregations, so changing the shown aggregations does not regroup
+@st.cache_resource(max_entries=4)
+def get_groupby_engine(dataset_key, rows, _df, _time_indexes):
+    return GroupByEngine(_df, _time_indexes)
+
+# Correlation matrix per dataset and options, so changing the threshold does not recompute it
+@st.cache_data(max_entries=8)
+def get_correlation(dataset_key, rows, method, pairwise, _df):
+    return correlation(_df, method=method, pairwise=pairwise)
+
+# Quartiles, fences and a capped outlier sample of every numeric column
+@st.cache_data(max_entries=4)
+def get_box_statistics(dataset_key, rows, _df):
+    return box_statistics(_df)
+
+# Missing-value bitmaps, built once per dataset (or filtered view)
+@st.cache_resource(max_entries=4)
+def get_null_bitmaps(dataset_key, _df):
+    return NullBitmaps(_df)
+
+# Rows of the active view, materialized once per dataset and filter instead of on every rerun
+@st.cache_resource(max_entries=4)
+def get_view(view_key, _df, _mask):
+    return select_rows(_df, _mask)
+
+# Value bitmaps of the filter columns and the Collection_Date index, built once per dataset
+@st.cache_resource(max_entries=4, show_spinner="Indexing filter columns...")
+def get_filter_index(dataset_key, _df):
+    return FilterIndex(_df)
+
+def filter_panel(df, dataset_key):
+    """Sidebar filters over the indexed columns; returns (selections, date_range)"""
+    index = get_filter_index(dataset_key, df)
+    selections, date_range = {}, None
+    with st.sidebar.expander("🔎 Filters"):
+        for col in index.columns:
+            selections[col] = st.multiselect(col, options=index.options(col), key=f"filter_{col}")
+        if index.dates is not None:
+            first, last = index.dates.bounds
+            if first is not None:
+                chosen = st.date_input(f"{index.dates.name} range", value=(first, last), min_value=first,
+                                       max_value=last, key="filter_dates")
+                if len(chosen) == 2 and (pd.Timestamp(chosen[0]), pd.Timestamp(chosen[1])) != (first, last):
+                    date_range = tuple(chosen)
+    return {col: values for col, values in selections.items() if values}, date_range
+
+def active_view(df, dataset_key, selections=None, date_range=None):
+    """``df`` narrowed by the filters set in this session, with the key identifying those rows.
+
+    Filters are specifications against the loaded frame that resolve to row
+    masks through cached indexes, so the cached frame is never modified.
+    """
+    masks, parts = [], {}
+    spec = st.session_state.get("missing_filter")
+    if spec and spec["dataset"] == dataset_key:
+        columns = [col for col in spec["columns"] if col in df.columns]
+        masks.append(get_null_bitmaps(dataset_key, df).missing_mask(spec["mode"], columns))
+        parts.update(missing=spec["mode"], columns=columns)
+    if selections or date_range:
+        masks.append(get_filter_index(dataset_key, df).mask(selections, date_range))
+        parts.update(selections=sorted(selections.items()), dates=date_range)
+    if not masks:
+        return df, dataset_key
+    view_key = cache_key(dataset_key, **parts)
+    return get_view(view_key, df, np.logical_and.reduce(masks)), view_key
+
+# Lineage tree of the Pangolin column with per-node counts, built once per dataset
+@st.cache_resource(max_entries=4)
+def get_lineage_trie(dataset_key, _series):
+    return LineageTrie(_series)
+
+# The frame with Pangolin rolled up to a depth; only the column's categories are remapped
+@st.cache_resource(max_entries=4)
+def get_lineage_view(view_key, _df, _trie, depth):
+    return _df.assign(Pangolin=_trie.rollup(_df["Pangolin"], depth))
+
+def lineage_depth_control(df, dataset_key, label, key):
+    """Depth selector for Pangolin lineages; returns ``df`` and its key with Pangolin rolled up to that depth"""
+    trie = get_lineage_trie(dataset_key, df["Pangolin"])
+    depth = st.selectbox(label, options=[None] + list(range(1, trie.max_depth + 1)), key=key,
+                         format_func=lambda depth: f"Full lineages ({len(trie.paths):,})" if depth is None
+                         else f"Depth {depth} ({trie.lineages(depth):,} lineages)")
+    if depth is None:
+        return df, dataset_key
+    view_key = cache_key(dataset_key, lineage_depth=depth)
+    return get_lineage_view(view_key, df, trie, depth), view_key
+
+# Week x country x lineage counts; prevalence charts are drawn from these cells, not the rows
+@st.cache_resource(max_entries=4, show_spinner="Counting lineages per week and country...")
+def get_prevalence_cube(dataset_key, _df):
+    return PrevalenceCube.from_frame(_df)
+
+# Column profile (exact numeric stats, sketched distinct counts and top values), built once per dataset
+@st.cache_resource(max_entries=4, show_spinner="Profiling dataset...")
+def get_profile(dataset_key, _df):
+    return profile_frame(_df)
+
+def table_viewer(df, dataset_key=None, key="table"):
+    """Paginated table: sorting and filtering run on the server, only the visible page is sent"""
+    view = get_table_view(dataset_key, df) if dataset_key is not None else TableView(df)
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort = st.selectbox("Sort by", [None] + list(df.columns), key=f"{key}_sort",
+                            format_func=lambda col: "(original order)" if col is None else col)
+    with col2:
+        ascending = st.toggle("Ascending", value=True, key=f"{key}_ascending", disabled=sort is None)
+    with col3:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250, 500], index=2, key=f"{key}_page_size")
+    
+    filters = {}
+    filter_cols = st.multiselect("Filter columns", list(df.columns), key=f"{key}_filters")
+    for col in filter_cols:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            value = st.date_input(f"{col} between", value=(), key=f"{key}_filter_{col}")
+            if len(value) == 2:
+                filters[col] = (pd.Timestamp(value[0]), pd.Timestamp(value[1]) + pd.Timedelta(days=1) - pd.Timedelta(1))
+        elif pd.api.types.is_numeric_dtype(series):
+            low_col, high_col = st.columns(2)
+            low = low_col.number_input(f"{col} from", value=None, key=f"{key}_filter_{col}_low")
+            high = high_col.number_input(f"{col} to", value=None, key=f"{key}_filter_{col}_high")
+            filters[col] = (low, high)
+        else:
+            filters[col] = st.text_input(f"{col} contains", key=f"{key}_filter_{col}")
+    
+    positions = view.positions(sort, ascending, filters)
+    pages = max(1, -(-len(positions) // page_size))
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+    rows = view.page(positions, int(page), page_size)
+    with profiler.stage("render table", payload=rows):
+        st.dataframe(rows, use_container_width=True)
+    first = (int(page) - 1) * page_size
+    st.caption(f"Rows {min(first + 1, len(positions)):,}–{first + len(rows):,} of {len(positions):,}"
+               + (f" (filtered from {len(df):,})" if len(positions) != len(df) else ""))
 
 # Theme toggle with vibrant colors and animations
 def set_theme():
@@ -440,30 +655,38 @@ def main():
     
     uploaded_file = st.file_uploader("Upload your COVID-19 dataset (CSV or Excel)", type=["csv", "xlsx"])
     
+    with st.expander("⚙️ Load Options"):
+        parallel = st.checkbox("Clean columns in parallel", value=False,
+                               help="Convert columns on a thread pool; faster on large files and multi-core machines")
+        streaming = st.checkbox("Streaming load (CSV only)", value=False,
+                                help="Read the file in chunks to keep memory usage close to the final dataset size")
+        chunksize = st.number_input("Chunk size (rows)", min_value=1000, value=DEFAULT_CHUNKSIZE, step=10000,
+                                    disabled=not streaming)
+        row_limit = st.number_input("Row limit for preview (0 = all rows)", min_value=0, value=0, step=1000)
+        use_disk_cache = st.checkbox("Use on-disk dataset cache", value=dataset_cache.available,
+                                     disabled=not dataset_cache.available,
+                                     help="Reuse the cleaned dataset when the same file is uploaded again")
+    
     if uploaded_file is not None:
-        df = load_data(uploaded_file)
+        nrows = int(row_limit) or None
+        # Identifies the loaded frame (file content + row limit) for every per-dataset cache
+        with profiler.stage("hash upload"):
+            dataset_key = cache_key(get_dataset_key(uploaded_file), nrows=nrows)
+        with profiler.stage("load data") as record:
+            df = load_data(uploaded_file, dataset_key, parallel=parallel, streaming=streaming,
+                           chunksize=int(chunksize), nrows=nrows, use_disk_cache=use_disk_cache)
+            record["payload"] = df
+        if df is not None and has_cube_columns(df):
+            # Built in one pass while loading, so the prevalence view never rescans the rows
+            with profiler.stage("prevalence cube"):
+                get_prevalence_cube(dataset_key, df)
         if df is not None:
-            # Display dataframe safely to avoid Arrow serialization issues
+            # Only the visible page of rows goes to the browser
             try:
-                # Try to display with Arrow optimization disabled
-                st.dataframe(df, use_container_width=True)
+                table_viewer(df, dataset_key, key="preview")
             except Exception as e:
                 st.warning(f"Display warning: {str(e)}")
-                # Fallback: show dataframe info and sample
-                st.write("**Dataset Information:**")
                 st.write(f"Shape: {df.shape[0]} rows × {df.shape[1]} columns")
-                st.write("**Column Names:**")
-                st.write(list(df.columns))
-                st.write("**First 5 rows:**")
-                st.write(df.head().to_string())
-                
-                # Try alternative display method
-                try:
-                    st.table(df.head(10))
-                except:
-                    st.write("**Sample Data (first 3 rows):**")
-                    for i, row in df.head(3).iterrows():
-                        st.write(f"Row {i}: {dict(row)}")
             
             # Animated success message
             st.markdown(f"""
@@ -524,6 +747,26 @@ def main():
         
         options = ["Basic Information", "Data Manipulation", "Data Visualization", "EDA", "Model Training", "ML Advance Model", "Settings"]
         choice = st.sidebar.selectbox("Select an Option", options)
+        profiler.context["page"] = choice
+        
+        # Every page works on the active view; the loaded frame stays untouched in the cache
+        base_df, base_key = df, dataset_key
+        selections, date_range = filter_panel(base_df, base_key)
+        with profiler.stage("filter rows"):
+            df, dataset_key = active_view(base_df, base_key, selections, date_range)
+        if df is not base_df:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.info(f"🔎 Active view: {len(df):,} of {len(base_df):,} rows")
+            with col2:
+                if st.button("Clear filters"):
+                    st.session_state.pop("missing_filter", None)
+                    for key in [key for key in st.session_state if str(key).startswith("filter_")]:
+                        del st.session_state[key]
+                    st.rerun()
+        if df.empty:
+            st.warning("No rows match the active filters. Clear them to continue.")
+            return
 
         # 1. Basic Information
         if choice == "Basic Information":
@@ -532,7 +775,14 @@ def main():
             with tab1:
                 st.write(f"Rows: {df.shape[0]}, Columns: {df.shape[1]}")
                 st.subheader(":gray[Statistics]", divider="gray")
-                st.dataframe(df.describe())
+                with profiler.stage("profile"):
+                    profile = get_profile(dataset_key, df)
+                st.dataframe(profile.frame(), hide_index=True)
+                st.caption("Distinct counts are HyperLogLog estimates (about ±2%).")
+                text_columns = [name for name, column in profile.columns.items() if column.top is not None]
+                if text_columns:
+                    top_column = st.selectbox("Most frequent values of", options=text_columns)
+                    st.dataframe(profile.top_values(top_column, k=20))
             with tab2:
                 st.subheader(":gray[Top Rows]")
                 toprows = st.slider("Top rows", 1, min(df.shape[0], 50), 5, key="topslide")
@@ -541,7 +791,7 @@ def main():
                 bottomrows = st.slider("Bottom rows", 1, min(df.shape[0], 50), 5, key="bottomslide")
                 st.dataframe(df.tail(bottomrows))
             with tab3:
-                st.dataframe(df.dtypes)
+                st.dataframe(df.dtypes.astype(str).rename("dtype"))
             with tab4:
                 st.dataframe(list(df.columns))
 
@@ -578,35 +828,83 @@ def main():
             """, unsafe_allow_html=True)
             
             if st.button("🔍 Find Missing Values"):
-                missing = df.isnull().sum()
-                for col, count in missing.items():
+                with profiler.stage("missing values"):
+                    summary = get_null_bitmaps(dataset_key, df).summary()
+                for col, count, dtype in summary.itertuples(index=False):
                     color = "red" if count > 0 else "green"
-                    st.markdown(f"<span style='color:{color}'>{col}: {count} missing (Type: {df[col].dtype})</span>", unsafe_allow_html=True)
+                    st.markdown(f"<span style='color:{color}'>{col}: {count} missing (Type: {dtype})</span>", unsafe_allow_html=True)
             
-            if st.button("Remove Missing Values"):
-                original_shape = df.shape
-                df.dropna(inplace=True)
-                new_shape = df.shape
-                st.success(f"Missing values removed! Rows: {original_shape[0]} → {new_shape[0]}, Columns: {original_shape[1]} → {new_shape[1]}")
-                st.dataframe(df.head())
-                st.session_state["cleaned_df"] = df
+            # Missing-value filters become part of the active view seen by every page
+            missing_columns = st.multiselect("Columns to check for missing values (empty = all columns)",
+                                             options=list(base_df.columns))
+            col1, col2 = st.columns(2)
+            for column, label, mode in [(col1, "Remove Missing Values", DROP_MISSING),
+                                        (col2, "Keep Only Rows With Missing Values", KEEP_MISSING)]:
+                with column:
+                    if st.button(label):
+                        st.session_state["missing_filter"] = {"dataset": base_key, "mode": mode, "columns": missing_columns}
+                        st.rerun()
 
             with st.expander("Group By Columns"):
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     groupby_cols = st.multiselect("Group by", options=list(df.columns))
                 with col2:
-                    operation_col = st.selectbox("Operation column", options=list(df.select_dtypes(include=[np.number]).columns) + ["Count"])
+                    operation_col = st.selectbox("Operation column", options=list(df.select_dtypes(include=[np.number]).columns) + [COUNT]
+                                                 + [col for col in df.columns if col not in groupby_cols
+                                                    and not pd.api.types.is_numeric_dtype(df[col])])
                 with col3:
-                    operation = st.selectbox("Operation", options=["sum", "max", "min", "mean", "median", "count"])
+                    # Text and date columns can only be counted
+                    options = [] if operation_col == COUNT else aggregations_for(df[operation_col])
+                    operations = st.multiselect("Operations", options=options, default=options[:1],
+                                                disabled=operation_col == COUNT)
                 
-                if groupby_cols and operation_col:
-                    if operation_col == "Count":
-                        result = df.groupby(groupby_cols).size().reset_index(name="count")
-                    else:
-                        result = df.groupby(groupby_cols).agg({operation_col: operation}).reset_index()
-                    st.dataframe(result)
+                # Lineage keys can be grouped by their ancestors at any depth of the Pango tree
+                group_df, group_key = df, dataset_key
+                if "Pangolin" in groupby_cols:
+                    group_df, group_key = lineage_depth_control(df, dataset_key, "Roll up Pangolin to", key="groupby_depth")
+                
+                # Date keys are bucketed and range-filtered through the precomputed time index
+                time_indexes = get_time_indexes(dataset_key, df)
+                date_keys = [col for col in groupby_cols if col in time_indexes]
+                bucket, date_range = "Month", None
+                if date_keys:
+                    col4, col5 = st.columns(2)
+                    with col4:
+                        bucket = st.selectbox("Date bucket", options=list(BUCKETS), index=2)
+                    index = time_indexes[date_keys[0]]
+                    first, last = index.bounds
+                    with col5:
+                        date_range = st.date_input(f"{date_keys[0]} range", value=(first, last),
+                                                   min_value=first, max_value=last) if first is not None else ()
+                
+                if groupby_cols and operation_col and (operations or operation_col == COUNT):
+                    with profiler.stage("groupby") as record:
+                        engine = get_groupby_engine(group_key, len(group_df), group_df, time_indexes)
+                        result = group_by(group_df, groupby_cols, operation_col, operations, bucket=bucket,
+                                          date_range=date_range, engine=engine)
+                        record["payload"] = result
+                    table_viewer(result, key="groupby")
                     st.session_state["groupby_result"] = result
+                    st.session_state["groupby_key"] = cache_key(group_key, by=groupby_cols, column=operation_col,
+                                                                operation=operations, bucket=bucket,
+                                                                range=date_range, rows=len(df))
+
+            if "Pangolin" in df.columns:
+                with st.expander("🧬 Lineage Hierarchy"):
+                    # Counts and the tree come from the trie's per-node totals, not from the rows
+                    trie = get_lineage_trie(dataset_key, df["Pangolin"])
+                    depth = st.slider("Depth", 1, max(trie.max_depth, 2), min(5, max(trie.max_depth, 1)), key="lineage_depth")
+                    counts = trie.counts_at(depth)
+                    st.caption(f"{len(counts):,} lineages at depth {depth} (from {len(trie.paths):,} reported)")
+                    table_viewer(counts.reset_index(), key="lineages")
+                    cached_figure(figure_key(dataset_key, "lineage sunburst", depth=depth),
+                                  lambda: (px.sunburst(trie.tree(depth), ids="lineage", names="lineage", parents="parent",
+                                                       values="count", branchvalues="total", template="plotly_dark"), None),
+                                  "lineage sunburst")
+                    lineage = st.selectbox("Ancestry of", options=list(trie.counts_at(trie.max_depth).index))
+                    if lineage:
+                        st.write(" → ".join(trie.ancestry(lineage)))
 
         # 3. Data Visualization
         elif choice == "Data Visualization":
@@ -615,45 +913,97 @@ def main():
             # Allow visualization of either groupby results or original data
             if "groupby_result" in st.session_state:
                 result = st.session_state["groupby_result"]
+                source_key = st.session_state["groupby_key"]
                 st.info("Visualizing Group By results")
             else:
                 result = df
+                source_key = dataset_key
                 st.info("Visualizing original dataset")
             
-            viz_type = st.selectbox("Chart Type", ["Bar", "Line", "Pie", "Scatter", "Sunburst", "Heatmap", "3D Scatter"])
+            viz_type = st.selectbox("Chart Type", ["Bar", "Line", "Pie", "Scatter", "Sunburst", "Heatmap", "3D Scatter",
+                                                   "Lineage Prevalence"])
+            
+            # Point charts: thin large data on the server and draw with WebGL
+            downsample = True
+            if viz_type in ("Line", "Scatter", "3D Scatter"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    downsample = st.checkbox("Downsample large data", value=True,
+                                             help="LTTB for lines, density binning for scatter plots")
+                with col2:
+                    max_points = st.number_input("Max points to draw", min_value=1000, step=1000, disabled=not downsample,
+                                                 value=MAX_LINE_POINTS if viz_type == "Line" else MAX_SCATTER_POINTS)
+            
+            # Category charts: aggregate on the server so Plotly gets one element per group
+            if viz_type in ("Bar", "Pie", "Sunburst"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    top_n = st.number_input("Top N categories", min_value=1, max_value=500, value=20,
+                                            help="Smaller categories are combined into 'Other'")
+                with col2:
+                    agg = st.selectbox("Aggregation", ["sum", "mean", "count"])
+            numeric_options = [COUNT] + list(result.select_dtypes(include=[np.number]).columns)
+            
+            def aggregate(keys, value):
+                data = aggregate_top_n(result, keys, None if value == COUNT else value, agg=agg, top_n=int(top_n))
+                return data, data.columns[-1], f"Aggregated {len(result):,} rows into {len(data):,} groups"
+            
+            def point_caption(rendered, original, method, webgl=None):
+                mode = "WebGL" if (rendered > WEBGL_THRESHOLD if webgl is None else webgl) else "SVG"
+                note = f" ({method})" if rendered < original else ""
+                return f"Rendering {rendered:,} of {original:,} points{note} · {mode}"
             
             try:
+                # Each branch picks its controls and defines how to build the chart; the figure is
+                # cached under those controls, so changing one chart does not rebuild another
+                build, params = None, {}
                 if viz_type == "Bar":
                     x_axis = st.selectbox("X-axis", options=result.columns)
-                    y_axis = st.selectbox("Y-axis", options=result.select_dtypes(include=[np.number]).columns)
-                    fig = px.bar(result, x=x_axis, y=y_axis, text_auto=True, template="plotly_dark")
-                    st.plotly_chart(fig)
+                    y_axis = st.selectbox("Y-axis", options=numeric_options)
+                    params = {"x": x_axis, "y": y_axis, "agg": agg, "top_n": top_n}
+                    def build():
+                        data, y, note = aggregate([x_axis], y_axis)
+                        return px.bar(data, x=x_axis, y=y, text_auto=True, template="plotly_dark"), note
                 elif viz_type == "Line":
                     x_axis = st.selectbox("X-axis", options=result.columns)
                     y_axis = st.selectbox("Y-axis", options=result.select_dtypes(include=[np.number]).columns)
-                    fig = px.line(result, x=x_axis, y=y_axis, markers=True, template="plotly_dark")
-                    st.plotly_chart(fig)
+                    params = {"x": x_axis, "y": y_axis, "downsample": downsample, "max_points": max_points}
+                    def build():
+                        data, original = downsample_line(result, x_axis, y_axis, int(max_points)) if downsample else (result, len(result))
+                        render_mode = "webgl" if len(data) > WEBGL_THRESHOLD else "svg"
+                        fig = px.line(data, x=x_axis, y=y_axis, markers=len(data) <= WEBGL_THRESHOLD, template="plotly_dark",
+                                      render_mode=render_mode)
+                        return fig, point_caption(len(data), original, "LTTB")
                 elif viz_type == "Pie":
                     names = st.selectbox("Names", options=result.columns)
-                    values = st.selectbox("Values", options=result.select_dtypes(include=[np.number]).columns)
-                    fig = px.pie(result, names=names, values=values, template="plotly_dark")
-                    st.plotly_chart(fig)
+                    values = st.selectbox("Values", options=numeric_options)
+                    params = {"names": names, "values": values, "agg": agg, "top_n": top_n}
+                    def build():
+                        data, value, note = aggregate([names], values)
+                        return px.pie(data, names=names, values=value, template="plotly_dark"), note
                 elif viz_type == "Scatter":
                     x_axis = st.selectbox("X-axis", options=result.columns)
                     y_axis = st.selectbox("Y-axis", options=result.select_dtypes(include=[np.number]).columns)
-                    fig = px.scatter(result, x=x_axis, y=y_axis, template="plotly_dark")
-                    st.plotly_chart(fig)
+                    params = {"x": x_axis, "y": y_axis, "downsample": downsample, "max_points": max_points}
+                    def build():
+                        data, original = downsample_scatter(result, [x_axis, y_axis], int(max_points)) if downsample else (result, len(result))
+                        render_mode = "webgl" if len(data) > WEBGL_THRESHOLD else "svg"
+                        fig = px.scatter(data, x=x_axis, y=y_axis, template="plotly_dark", render_mode=render_mode)
+                        return fig, point_caption(len(data), original, "density sampled")
                 elif viz_type == "Sunburst":
                     path = st.multiselect("Path", options=result.columns)
                     if path:
-                        values = st.selectbox("Values", options=result.select_dtypes(include=[np.number]).columns)
-                        fig = px.sunburst(result, path=path, values=values, template="plotly_dark")
-                        st.plotly_chart(fig)
+                        values = st.selectbox("Values", options=numeric_options)
+                        params = {"path": path, "values": values, "agg": agg, "top_n": top_n}
+                        def build():
+                            data, value, note = aggregate(path, values)
+                            return px.sunburst(data, path=path, values=value, template="plotly_dark"), note
                 elif viz_type == "Heatmap":
                     numeric_cols = result.select_dtypes(include=[np.number]).columns
                     if len(numeric_cols) > 1:
-                        fig = px.imshow(result[numeric_cols].corr(), color_continuous_scale="RdBu", text_auto=True, template="plotly_dark")
-                        st.plotly_chart(fig)
+                        def build():
+                            fig = px.imshow(result[numeric_cols].corr(), color_continuous_scale="RdBu", text_auto=True, template="plotly_dark")
+                            return fig, None
                     else:
                         st.error("Need at least 2 numeric columns for a heatmap!")
                 elif viz_type == "3D Scatter":
@@ -661,8 +1011,44 @@ def main():
                     y_axis = st.selectbox("Y-axis", options=result.select_dtypes(include=[np.number]).columns)
                     z_axis = st.selectbox("Z-axis", options=result.select_dtypes(include=[np.number]).columns)
                     color = st.selectbox("Color", options=[None] + list(result.columns))
-                    fig = px.scatter_3d(result, x=x_axis, y=y_axis, z=z_axis, color=color, template="plotly_dark")
-                    st.plotly_chart(fig)
+                    params = {"x": x_axis, "y": y_axis, "z": z_axis, "color": color, "downsample": downsample, "max_points": max_points}
+                    def build():
+                        # scatter_3d always draws with WebGL; only the point count needs limiting
+                        data, original = (downsample_scatter(result, [x_axis, y_axis, z_axis], int(max_points))
+                                          if downsample else (result, len(result)))
+                        fig = px.scatter_3d(data, x=x_axis, y=y_axis, z=z_axis, color=color, template="plotly_dark")
+                        return fig, point_caption(len(data), original, "density sampled", webgl=True)
+                elif viz_type == "Lineage Prevalence":
+                    # Always the loaded rows (not group-by results), read from the week x country x lineage cube
+                    if has_cube_columns(df):
+                        cube = get_prevalence_cube(dataset_key, df)
+                        trie = get_lineage_trie(dataset_key, df["Pangolin"])
+                        countries = st.multiselect("Countries (empty = all)", options=list(cube.country_totals().index))
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            top_lineages = st.number_input("Top lineages", min_value=1, max_value=50, value=10,
+                                                           help="Smaller lineages are combined into 'Other'")
+                        with col2:
+                            depth = st.selectbox("Lineage depth", options=[None] + list(range(1, trie.max_depth + 1)),
+                                                 format_func=lambda depth: "Full lineages" if depth is None else f"Depth {depth}")
+                        with col3:
+                            measure = st.selectbox("Show", ["Share (%)", "Count"])
+                        params = {"dataset": dataset_key, "countries": countries, "top": top_lineages, "depth": depth, "measure": measure}
+                        def build():
+                            data = cube.prevalence(countries, top_n=int(top_lineages), trie=trie, depth=depth)
+                            y = "share" if measure == "Share (%)" else "count"
+                            fig = px.area(data, x="week", y=y, color="lineage", template="plotly_dark",
+                                          labels={"share": "Share (%)", "week": "Week"})
+                            weeks = data["week"].nunique()
+                            note = f"{weeks:,} weeks from {len(cube):,} week × country × lineage cells"
+                            if cube.truncated:
+                                note += f"; {cube.truncated:,} rows dated only to the month or year are left out"
+                            return fig, note
+                    else:
+                        st.error("Needs parsed Collection_Date, Country and Pangolin columns!")
+                
+                if build is not None:
+                    cached_figure(figure_key(source_key, viz_type, **params), build, f"{viz_type.lower()} chart")
             except Exception as e:
                 st.error(f"Error rendering chart: {str(e)}")
 
@@ -670,16 +1056,25 @@ def main():
         elif choice == "EDA":
             st.subheader(":rainbow[Exploratory Data Analysis]", divider="rainbow")
             
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                method = st.selectbox("Correlation method", options=CORRELATION_METHODS, format_func=str.title)
+            with col2:
+                threshold = st.slider("Collinearity threshold", min_value=0.0, max_value=1.0, value=0.8, step=0.05)
+            with col3:
+                pairwise = st.checkbox("Pairwise missing values", value=True,
+                                       help="Use every row where both columns are present instead of complete rows only")
+            
             if st.button("Check Collinearity"):
-                numeric_df = df.select_dtypes(include=[np.number])
-                if numeric_df.shape[1] > 1:
-                    corr = numeric_df.corr()
-                    fig = px.imshow(corr, color_continuous_scale="RdBu", text_auto=True, template="plotly_dark")
-                    st.plotly_chart(fig)
-                    threshold = 0.8
-                    high_corr = [(col1, col2, corr.loc[col1, col2]) for col1 in corr.columns for col2 in corr.columns if col1 < col2 and abs(corr.loc[col1, col2]) > threshold]
+                with profiler.stage("correlation"):
+                    corr = get_correlation(dataset_key, len(df), method, pairwise, df)
+                if corr.shape[1] > 1:
+                    cached_figure(figure_key(dataset_key, "correlation heatmap", method=method, pairwise=pairwise, rows=len(df)),
+                                  lambda: (px.imshow(corr, color_continuous_scale="RdBu", text_auto=True, template="plotly_dark"), None),
+                                  "correlation heatmap")
+                    high_corr = high_correlations(corr, threshold=threshold)
                     if high_corr:
-                        st.write("High collinearity pairs (>|0.8|):")
+                        st.write(f"High collinearity pairs (>|{threshold:g}|):")
                         for col1, col2, val in high_corr:
                             st.markdown(f"<span style='color:red'>{col1} and {col2}: {val:.2f}</span>", unsafe_allow_html=True)
                     else:
@@ -688,14 +1083,29 @@ def main():
                     st.error("Not enough numeric columns for collinearity check!")
             
             if st.button("Check Outliers"):
-                for col in df.select_dtypes(include=[np.number]).columns:
+                with profiler.stage("outliers"):
+                    summary, points = get_box_statistics(dataset_key, len(df), df)
+                
+                def box_plot(stats):
+                    # Drawn from the precomputed statistics; only a sample of the outliers is shipped
+                    col = stats["column"]
                     fig = go.Figure()
-                    fig.add_trace(go.Box(y=df[col], name=col, boxpoints="suspectedoutliers"))
-                    fig.update_layout(template="plotly_dark")
-                    st.plotly_chart(fig)
-                    Q1, Q3 = df[col].quantile([0.25, 0.75])
-                    IQR = Q3 - Q1
-                    outliers = ((df[col] < (Q1 - 1.5 * IQR)) | (df[col] > (Q3 + 1.5 * IQR))).sum()
+                    fig.add_trace(go.Box(x=[col], q1=[stats["q1"]], median=[stats["median"]], q3=[stats["q3"]],
+                                         lowerfence=[stats["whisker_low"]], upperfence=[stats["whisker_high"]],
+                                         name=col, boxpoints=False))
+                    sample = points.get(col, [])
+                    if len(sample):
+                        fig.add_trace(go.Scatter(x=[col] * len(sample), y=sample, mode="markers", name="outliers",
+                                                 marker={"size": 4, "color": "#EF553B"}))
+                    fig.update_layout(template="plotly_dark", showlegend=False)
+                    note = f"Showing {len(sample):,} of {stats['outliers']:,} outliers" if len(sample) < stats["outliers"] else None
+                    return fig, note
+                
+                for stats in summary.to_dict("records"):
+                    if not stats["count"]:
+                        continue
+                    col, outliers = stats["column"], stats["outliers"]
+                    cached_figure(figure_key(dataset_key, "box", column=col, rows=len(df)), lambda stats=stats: box_plot(stats), "box plot")
                     st.markdown(f"<span style='color:{'red' if outliers > 0 else 'green'}'>{col}: {outliers} outliers</span>", unsafe_allow_html=True)
 
         # 5. Model Training
@@ -704,20 +1114,30 @@ def main():
             
             if "Pangolin" in df.columns:
                 try:
-                    # Prepare features and target
-                    feature_cols = [col for col in df.columns if col not in ["Pangolin", "Accession"]]
-                    X = pd.get_dummies(df[feature_cols])
-                    y = df["Pangolin"]
+                    # Rolling the target up to a lineage depth trades detail for fewer, better-populated classes
+                    df, dataset_key = lineage_depth_control(df, dataset_key, "Target lineage depth", key="train_depth")
+                    # Prepare features and target (cached, shared with ML Advance Model)
+                    config = encoding_controls()
+                    with profiler.stage("features") as record:
+                        features = get_features(dataset_key, config, df)
+                        record["payload"] = features.X
+                    show_encoding_report(features.report)
                     
                     # Check if we have enough data
-                    if len(X) < 10:
+                    if features.X.shape[0] < 10:
                         st.error("Not enough data for training! Need at least 10 samples.")
                     else:
-                        # Split the data
-                        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-                        
                         model_type = st.selectbox("Model Type", ["Random Forest"])
                         
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            n_estimators = st.slider("Number of trees", 10, 1000, 100, step=10)
+                        with col2:
+                            batch_size = st.slider("Trees per batch", 1, 100, 10)
+                        with col3:
+                            time_budget = st.number_input("Time budget (s, 0 = none)", min_value=0, value=0, step=10)
+                        use_all_cores = st.checkbox("Use all CPU cores", value=True)
+                        
                         # Animated training button
                         st.markdown("""
                         <style>
@@ -754,12 +1174,32 @@ def main():
                         """, unsafe_allow_html=True)
                         
                         if st.button("🚀 Train Model"):
+                            # Slice the cached split only when training; each read copies the rows
+                            X_train, X_test = features.X_train, features.X_test
+                            y_train, y_test = features.y_train, features.y_test
                             with st.spinner("🤖 Training model..."):
+                                # Grow the forest batch by batch with live out-of-bag accuracy
+                                progress_bar = st.progress(0.0, text="Growing trees...")
+                                oob_chart = st.empty()
+                                def on_batch(trees, total, oob, elapsed):
+                                    progress_bar.progress(trees / total, text=f"{trees}/{total} trees · {elapsed:.1f}s"
+                                                          + (f" · OOB accuracy {oob:.3f}" if oob is not None else ""))
+                                    if oob is not None:
+                                        # OOB accuracy is only re-estimated at checkpoints
+                                        oob_points.append({"Trees": trees, "OOB Accuracy": oob})
+                                        oob_chart.line_chart(pd.DataFrame(oob_points), x="Trees", y="OOB Accuracy")
+                                oob_points = []
                                 if model_type == "Random Forest":
-                                    model = RandomForestClassifier(n_estimators=100, random_state=42)
+                                    with profiler.stage("train"):
+                                        model, history = train_forest(X_train, y_train, n_estimators=n_estimators,
+                                                                      batch_size=batch_size, n_jobs=-1 if use_all_cores else 1,
+                                                                      time_budget=time_budget or None, progress=on_batch)
+                                progress_bar.empty()
+                                if history and history[-1]["trees"] < n_estimators:
+                                    st.warning(f"Time budget reached: kept {history[-1]['trees']} of {n_estimators} trees.")
                                 
-                                model.fit(X_train, y_train)
-                                y_pred = model.predict(X_test)
+                                with profiler.stage("predict"):
+                                    y_pred = model.predict(X_test)
                                 accuracy = accuracy_score(y_test, y_pred)
                                 
                                 # Animated success message
@@ -822,7 +1262,51 @@ def main():
                                 st.session_state["X_test"] = X_test
                                 st.session_state["y_test"] = y_test
                                 st.session_state["y_pred"] = y_pred
-                                st.session_state["feature_names"] = X.columns.tolist()
+                                st.session_state["feature_names"] = features.feature_names
+                                
+                                try:
+                                    model_id = model_registry.save(
+                                        model, features.schema, dataset_key=dataset_key, config=features.config,
+                                        metrics={"accuracy": float(accuracy),
+                                                 "oob_score": history[-1]["oob_score"] if history else None,
+                                                 "trees": int(model.n_estimators),
+                                                 "seconds": history[-1]["seconds"] if history else None},
+                                        evaluation={"y_test": y_test, "y_pred": y_pred, "test_idx": features.test_idx},
+                                    )
+                                    st.session_state["model_id"] = model_id
+                                    st.caption(f"Saved as model version {model_id}")
+                                except OSError as e:
+                                    st.warning(f"Could not save the model: {e}")
+                        
+                        with st.expander("📦 Saved Models"):
+                            versions = model_registry.list()
+                            if versions.empty:
+                                st.info("No saved models yet. Train one to create the first version.")
+                            else:
+                                st.dataframe(versions, use_container_width=True)
+                                selected_id = st.selectbox("Model version", versions["id"].tolist())
+                                col1, col2 = st.columns(2)
+                                with col1:
+                                    if st.button("📂 Load Model"):
+                                        try:
+                                            model, schema, meta = model_registry.load(selected_id)
+                                            evaluation = model_registry.load_evaluation(selected_id)
+                                            st.session_state["model"] = model
+                                            st.session_state["feature_names"] = schema["feature_names"]
+                                            st.session_state["model_id"] = selected_id
+                                            if evaluation is not None:
+                                                st.session_state["y_test"] = evaluation["y_test"]
+                                                st.session_state["y_pred"] = evaluation["y_pred"]
+                                            if meta.get("dataset_key") != dataset_key:
+                                                st.warning("This model was trained on a different dataset.")
+                                            st.success(f"Loaded model version {selected_id}")
+                                        except Exception as e:
+                                            st.error(f"Error loading model: {e}")
+                                with col2:
+                                    keep = st.number_input("Keep newest versions", min_value=1, value=model_registry.keep)
+                                    if st.button("🧹 Prune Old Versions"):
+                                        removed = model_registry.prune(keep=int(keep))
+                                        st.success(f"Removed {len(removed)} model version(s)")
                         
                         if "y_pred" in st.session_state:
                             if st.button("Show Confusion Matrix"):
@@ -855,27 +1339,52 @@ def main():
             
             if "Pangolin" in df.columns:
                 try:
-                    # Prepare features and target
-                    feature_cols = [col for col in df.columns if col not in ["Pangolin", "Accession"]]
-                    X = pd.get_dummies(df[feature_cols])
-                    y = df["Pangolin"]
+                    # Rolling the target up to a lineage depth trades detail for fewer, better-populated classes
+                    df, dataset_key = lineage_depth_control(df, dataset_key, "Target lineage depth", key="cv_depth")
+                    # Prepare features and target (cached, shared with Model Training)
+                    config = encoding_controls()
+                    with profiler.stage("features") as record:
+                        features = get_features(dataset_key, config, df)
+                        record["payload"] = features.X
+                    show_encoding_report(features.report)
+                    X, y = features.X, features.y
                     
-                    if len(X) < 10:
+                    if X.shape[0] < 10:
                         st.error("Not enough data for cross-validation! Need at least 10 samples.")
                     else:
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            n_splits = st.slider("Number of folds", 2, 10, 5)
+                        with col2:
+                            strategies = {"Merge rare lineages": MERGE, "Drop rare lineages": DROP_RARE, "Grouped folds": GROUP}
+                            strategy = strategies[st.selectbox("Rare lineage strategy", list(strategies),
+                                                               help="Lineages with fewer rows than folds cannot be stratified")]
+                        groups = None
+                        if strategy == GROUP:
+                            group_col = st.selectbox("Group by column", [c for c in ["BioProject", "Country", "Organization"] if c in df.columns]
+                                                     + [c for c in df.columns if c not in ["BioProject", "Country", "Organization", "Pangolin"]])
+                            # prepare_features leaves out rows without a target; keep the groups aligned
+                            groups = df[group_col] if features.rows is None else df[group_col].iloc[features.rows]
+                        
                         if st.button("Cross Validation"):
                             with st.spinner("Performing cross-validation..."):
-                                model = RandomForestClassifier(n_estimators=100, random_state=42)
-                                scores = cross_val_score(model, X, y, cv=5, scoring='accuracy')
+                                # Folds run in parallel processes; results are cached per (data, params, fold)
+                                with profiler.stage("cross-validation"):
+                                    results = cross_validate_forest(X, y, n_splits=n_splits, strategy=strategy, groups=groups,
+                                                                    data_key=cache_key(dataset_key, config=features.config),
+                                                                    cache_dir=cv_cache_dir, n_estimators=100)
+                                scores = results["score"].to_numpy()
                                 
                                 st.success("Cross-validation completed!")
+                                if results["cached"].any():
+                                    st.caption(f"{int(results['cached'].sum())} of {len(results)} folds reused from cache")
                                 st.write(f"CV Scores: {[f'{score:.3f}' for score in scores]}")
                                 st.metric("Average CV Score", f"{np.mean(scores):.3f}")
                                 st.metric("Standard Deviation", f"{np.std(scores):.3f}")
                                 
                                 # Visualize CV scores
                                 cv_df = pd.DataFrame({
-                                    'Fold': range(1, 6),
+                                    'Fold': results["fold"],
                                     'Score': scores
                                 })
                                 fig = px.bar(cv_df, x='Fold', y='Score', title="Cross-Validation Scores",
@@ -895,9 +1404,39 @@ def main():
                 st.session_state.theme = "dark" if st.session_state.theme == "light" else "light"
                 set_theme()
                 st.rerun()
+            
+            st.subheader(":gray[Dataset Cache]", divider="gray")
+            entries = dataset_cache.entries()
+            st.write(f"Location: `{dataset_cache.root}`")
+            st.write(f"{len(entries)} cached datasets, {entries['bytes'].sum() / 2**20:.1f} MB "
+                     f"of {dataset_cache.max_bytes / 2**20:.0f} MB")
+            if len(entries):
+                st.dataframe(entries.assign(size_mb=(entries["bytes"] / 2**20).round(2)).drop(columns=["bytes"]))
+            if st.button("Clear Dataset Cache"):
+                dataset_cache.clear()
+                load_data.clear()
+                st.success("Dataset cache cleared!")
+
+def show_diagnostics():
+    """Sidebar panel with the stage timings of the rerun that just finished"""
+    with st.sidebar.expander("🩺 Diagnostics"):
+        stages = profiler.frame()
+        if stages.empty:
+            st.caption("No instrumented stages ran on this rerun.")
+        else:
+            st.caption(f"{len(stages)} stages, {profiler.total_ms:.0f} ms in total")
+            st.dataframe(stages.round(2), hide_index=True, use_container_width=True)
+        figures = get_figure_cache()
+        st.caption(f"Figure cache: {len(figures)} figures, {figures.total_bytes / 2 ** 20:.1f} MB "
+                   f"({figures.hits} hits, {figures.misses} misses)")
+        if profiler.log_path:
+            st.caption(f"Logging to `{profiler.log_path}`")
+        else:
+            st.caption("Set COVID_ANALYZER_PROFILE_LOG to append every rerun to a JSON-lines log.")
 
 if __name__ == "__main__":
     main()
+    show_diagnostics()
 
 
 # 1.ST PY
@@ -0,0 +1,81 @@
+"""Data-processing core for the COVID-19 Variants Detection Analyzer.
+
+Everything in this package is free of Streamlit so it can be reused from
+batch jobs; ``1.py`` wires it into the web app and ``python -m covid_analyzer``
+runs the same stages from the command line.
+"""
+
+from .analysis import (
+    aggregate_top_n,
+    box_statistics,
+    correlation,
+    drop_missing,
+    group_by,
+    high_correlations,
+    missing_summary,
+    outlier_summary,
+)
+from .cleaning import (
+    CATEGORICAL,
+    DATE,
+    NUMERIC,
+    STRING,
+    classify_column,
+    clean_dataframe,
+    convert_column,
+    infer_schema,
+)
+from .correlation import CorrelationAccumulator, streaming_correlation
+from .cube import PrevalenceCube
+from .dates import TimeIndex, build_time_indexes, parse_dates
+from .features import EncodingConfig, FeatureSet, encode_with_schema, prepare_features
+from .filters import FilterIndex, NullBitmaps
+from .groupby import GroupByEngine
+from .ingest import load_dataset, read_csv_streaming
+from .lineages import LineageTrie
+from .registry import ModelRegistry
+from .scoring import score_csv
+from .summary import DatasetProfile, profile_csv, profile_frame
+from .training import cross_validate_forest, train_forest
+
+__all__ = [
+    "CATEGORICAL",
+    "DATE",
+    "NUMERIC",
+    "STRING",
+    "CorrelationAccumulator",
+    "DatasetProfile",
+    "EncodingConfig",
+    "FeatureSet",
+    "FilterIndex",
+    "GroupByEngine",
+    "LineageTrie",
+    "ModelRegistry",
+    "NullBitmaps",
+    "PrevalenceCube",
+    "TimeIndex",
+    "aggregate_top_n",
+    "box_statistics",
+    "build_time_indexes",
+    "classify_column",
+    "clean_dataframe",
+    "convert_column",
+    "correlation",
+    "cross_validate_forest",
+    "drop_missing",
+    "encode_with_schema",
+    "group_by",
+    "high_correlations",
+    "infer_schema",
+    "load_dataset",
+    "missing_summary",
+    "outlier_summary",
+    "parse_dates",
+    "prepare_features",
+    "profile_csv",
+    "profile_frame",
+    "read_csv_streaming",
+    "score_csv",
+    "streaming_correlation",
+    "train_forest",
+]
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+from .correlation import correlation_matrix
+from .groupby import AGGREGATIONS, GroupByEngine, key_codes
+
+OPERATIONS = AGGREGATIONS
+COUNT = "Count"
+
+
+def missing_summary(df):
+    """Missing-value count and dtype per column"""
+    return pd.DataFrame({
+        "column": df.columns,
+        "missing": df.isna().sum().to_numpy(),
+        "dtype": [str(dtype) for dtype in df.dtypes],
+    })
+
+
+def drop_missing(df):
+    """Rows of ``df`` without any missing value"""
+    return df.dropna()
+
+
+def group_by(df, groupby_cols, operation_col=COUNT, operation="count", time_indexes=None, bucket="Month",
+             date_range=None, engine=None):
+    """Group ``df`` and aggregate one column (or count rows).
+
+    Date keys found in ``time_indexes`` are truncated to ``bucket`` and, when
+    ``date_range`` is a ``(start, end)`` pair, rows are first limited to that
+    range of the first date key through its sorted index. ``operation`` may be
+    a list, giving one ``<column>_<operation>`` column each; pass a long-lived
+    :class:`~covid_analyzer.groupby.GroupByEngine` as ``engine`` to reuse work
+    across calls.
+    """
+    engine = engine or GroupByEngine(df, time_indexes)
+    if operation_col == COUNT:
+        return engine.aggregate(groupby_cols, bucket=bucket, date_range=date_range)
+    if isinstance(operation, str):
+        result = engine.aggregate(groupby_cols, operation_col, [operation], bucket=bucket, date_range=date_range)
+        return result.rename(columns={f"{operation_col}_{operation}": operation_col})
+    return engine.aggregate(groupby_cols, operation_col, operation, bucket=bucket, date_range=date_range)
+
+
+def correlation(df, method="pearson", pairwise=True):
+    """Pearson or Spearman correlation matrix of the numeric columns.
+
+    ``pairwise`` uses every row where both columns of a pair are present;
+    otherwise rows with any missing numeric value are left out.
+    """
+    return correlation_matrix(df, method=method, pairwise=pairwise)
+
+
+def high_correlations(corr, threshold=0.8):
+    """Column pairs whose absolute correlation exceeds ``threshold``, strongest first"""
+    rows, cols = np.triu_indices(len(corr.columns), k=1)
+    values = corr.to_numpy()[rows, cols]
+    keep = np.flatnonzero(np.abs(values) > threshold)
+    keep = keep[np.argsort(-np.abs(values[keep]), kind="stable")]
+    return [(corr.columns[rows[i]], corr.columns[cols[i]], values[i]) for i in keep]
+
+
+BOX_COLUMNS = ["column", "count", "q1", "median", "q3", "lower", "upper", "whisker_low", "whisker_high", "outliers"]
+
+
+def box_statistics(df, factor=1.5, max_points=500):
+    """Box-plot statistics of every numeric column and a sample of their outliers.
+
+    All numeric columns are sorted together as one 2-D array; quartiles are
+    interpolated from the sorted values (as ``Series.quantile`` does) and the
+    whiskers and outlier counts come from binary searches for the IQR fences,
+    so no per-column mask is evaluated. Returns ``(summary, points)`` where
+    ``points`` maps each column to at most ``max_points`` of its outliers,
+    evenly spaced in sorted order so the most extreme ones are always kept.
+    """
+    numeric = df.select_dtypes(include=[np.number])
+    values = np.sort(numeric.to_numpy(dtype=np.float64, na_value=np.nan), axis=0)  # NaN sorts last
+    counts = (~np.isnan(values)).sum(axis=0)
+
+    def quantile(q):
+        position = q * np.maximum(counts - 1, 0)
+        low, high = np.floor(position).astype(np.int64), np.ceil(position).astype(np.int64)
+        low_values = np.take_along_axis(values, low[None, :], axis=0)[0]
+        high_values = np.take_along_axis(values, high[None, :], axis=0)[0]
+        result = low_values + (high_values - low_values) * (position - low)
+        return np.where(counts > 0, result, np.nan)
+
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    lower, upper = q1 - factor * iqr, q3 + factor * iqr
+
+    records, points = [], {}
+    for i, col in enumerate(numeric.columns):
+        column = values[:counts[i], i]
+        if not len(column):
+            records.append((col, 0, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, 0))
+            continue
+        first = np.searchsorted(column, lower[i], side="left")
+        last = np.searchsorted(column, upper[i], side="right")
+        outliers = np.concatenate([column[:first], column[last:]])
+        if len(outliers) > max_points:
+            outliers = outliers[np.linspace(0, len(outliers) - 1, max_points).round().astype(np.int64)]
+        points[col] = outliers
+        records.append((col, int(counts[i]), q1[i], median[i], q3[i], lower[i], upper[i],
+                        column[min(first, len(column) - 1)], column[max(last - 1, 0)],
+                        int(first + len(column) - last)))
+    return pd.DataFrame.from_records(records, columns=BOX_COLUMNS), points
+
+
+def outlier_summary(df, factor=1.5):
+    """IQR fences, box statistics and outlier count for every numeric column"""
+    return box_statistics(df, factor=factor, max_points=0)[0]
+
+
+def aggregate_top_n(df, keys, value=None, agg="sum", top_n=20, other="Other"):
+    """Aggregate ``value`` (or count rows) by ``keys``, keeping the ``top_n`` largest groups per key.
+
+    Text and categorical keys are reduced to their ``top_n`` categories by total
+    (rows or ``value``); the rest become one ``other`` bucket. Numeric and date
+    keys are grouped exactly. Everything runs on integer codes with
+    ``np.bincount``, so the cost is one pass over the rows and the result has
+    at most ``(top_n + 1) ** len(keys)`` rows. ``agg`` is ``sum``, ``mean`` or
+    ``count``; the value column is named after ``value`` (``count`` for rows).
+    """
+    keys = list(keys)
+    weights = None
+    if value is not None:
+        weights = df[value].to_numpy(dtype=np.float64, na_value=np.nan)
+    present = np.ones(len(df), dtype=bool) if weights is None else ~np.isnan(weights)
+
+    level_codes, level_labels = [], []
+    for key in keys:
+        codes, labels = key_codes(df[key])
+        bucketable = not (pd.api.types.is_numeric_dtype(df[key]) or pd.api.types.is_datetime64_any_dtype(df[key]))
+        if bucketable and top_n and len(labels) > top_n:
+            valid = codes >= 0
+            totals = np.bincount(codes[valid], weights=None if weights is None else np.nan_to_num(weights[valid]),
+                                 minlength=len(labels))
+            top = np.argsort(-totals, kind="stable")[:top_n]
+            remap = np.full(len(labels), top_n, dtype=np.int64)
+            remap[top] = np.arange(top_n)
+            codes = np.where(valid, remap[np.maximum(codes, 0)], -1)
+            labels = pd.Index([str(label) for label in labels[top]] + [other], dtype=object)
+        level_codes.append(codes)
+        level_labels.append(labels)
+
+    valid = present.copy()
+    for codes in level_codes:
+        valid &= codes >= 0
+    sizes = [len(labels) for labels in level_labels]
+    combined = np.ravel_multi_index([codes[valid] for codes in level_codes], sizes) if keys else np.zeros(valid.sum(), np.int64)
+    groups, inverse = np.unique(combined, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(groups))
+    if weights is None or agg == "count":
+        values = counts
+    else:
+        values = np.bincount(inverse, weights=weights[valid], minlength=len(groups))
+        if agg == "mean":
+            values = values / counts
+
+    result = {}
+    for key, labels, codes in zip(keys, level_labels, np.unravel_index(groups, sizes) if keys else []):
+        result[key] = np.asarray(labels, dtype=object)[codes]
+    result[value if value is not None else "count"] = values
+    frame = pd.DataFrame(result)
+    return frame.sort_values(frame.columns[-1], ascending=False, ignore_index=True)
@@ -0,0 +1,216 @@
+"""Benchmark suite: time and peak memory of every analysis stage on synthetic data.
+
+Each stage runs on the frame produced by the previous ones, exactly as the
+app chains them. Peak memory is the highest resident set size seen by a
+background sampler while the stage runs, minus the size when it started, so
+allocations made by pandas, NumPy, Arrow and scikit-learn all count.
+
+Results are written as JSON together with the library versions and the git
+revision, and :func:`compare_results` lines up two such files.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .analysis import correlation, group_by, high_correlations, outlier_summary
+from .cleaning import clean_dataframe
+from .dates import build_time_indexes
+from .features import EncodingConfig, prepare_features
+from .ingest import csv_dtypes
+from .profiling import rss_bytes
+from .schema import NCBI_SCHEMA
+from .synthetic import write_dataset
+from .training import cross_validate_forest, train_forest
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+STAGES = ["load", "clean", "describe", "groupby", "correlation", "outliers", "features", "train", "cv"]
+# Generated datasets are large, so they live with the other caches rather than in the checkout
+DEFAULT_DATA_DIR = os.environ.get(
+    "COVID_ANALYZER_BENCH_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "covid_analyzer", "benchmark"),
+)
+
+
+class PeakMemory:
+    """Context manager sampling RSS in a thread; ``peak`` is the growth in bytes"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+
+    def __enter__(self):
+        self.start = rss_bytes()
+        self.highest = self.start
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.highest = max(self.highest, rss_bytes())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.highest = max(self.highest, rss_bytes())
+        self.peak = self.highest - self.start
+        return False
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Versions and hardware the results were measured with"""
+    import scipy
+    import sklearn
+
+    return {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "scikit-learn": sklearn.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def dataset_path(rows, data_dir, seed=0):
+    """Path of the synthetic file for ``rows``, generating it on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"ncbi_synthetic_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        write_dataset(path, rows, seed=seed)
+    return path
+
+
+def run_size(path, stages=STAGES, trees=10, train_rows=10_000, folds=3):
+    """Run the stages on one file; yields ``(stage, seconds, peak_bytes)``.
+
+    Feature encoding, training and cross-validation use a random sample of at
+    most ``train_rows`` rows: a full-depth forest stores a class distribution
+    per node, so its memory grows with rows x lineages and the full files
+    would not fit on a typical machine.
+    """
+    state = {}
+
+    def load():
+        state["df"] = pd.read_csv(path, dtype=csv_dtypes(NCBI_SCHEMA))
+
+    def clean():
+        state["df"] = clean_dataframe(state["df"], known=NCBI_SCHEMA)
+
+    def describe():
+        state["df"].describe(include="all")
+
+    def groupby():
+        df = state["df"]
+        time_indexes = build_time_indexes(df)
+        group_by(df, ["Country", "Collection_Date"], time_indexes=time_indexes, bucket="Week")
+        group_by(df, ["Pangolin"], "Length", "mean")
+
+    def corr():
+        high_correlations(correlation(state["df"]))
+
+    def outliers():
+        outlier_summary(state["df"])
+
+    def features():
+        df = state["df"]
+        if len(df) > train_rows:
+            df = df.sample(train_rows, random_state=0)
+        state["features"] = prepare_features(df, config=EncodingConfig())
+
+    def train():
+        features = state["features"]
+        train_forest(features.X_train, features.y_train, n_estimators=trees, batch_size=trees, oob_score=False)
+
+    def cv():
+        features = state["features"]
+        cross_validate_forest(features.X, features.y, n_splits=folds, n_estimators=trees)
+
+    steps = {"load": load, "clean": clean, "describe": describe, "groupby": groupby, "correlation": corr,
+             "outliers": outliers, "features": features, "train": train, "cv": cv}
+    # Later stages work on the cleaned frame; training and CV on the features
+    needed = set(stages)
+    if needed - {"load"}:
+        needed |= {"load", "clean"}
+    if needed & {"train", "cv"}:
+        needed.add("features")
+    for stage in STAGES:
+        if stage not in needed:
+            continue
+        memory = PeakMemory()
+        started = time.perf_counter()
+        with memory:
+            steps[stage]()
+        seconds = time.perf_counter() - started
+        if stage in stages:
+            yield stage, seconds, memory.peak
+
+
+def run_benchmarks(sizes=SIZES, stages=STAGES, data_dir=DEFAULT_DATA_DIR, output=None, seed=0, trees=10,
+                   train_rows=10_000, progress=None):
+    """Benchmark every stage at every size; returns (and optionally writes) the result document.
+
+    ``progress`` is called with each result record as soon as it is measured.
+    """
+    records = []
+    for rows in sizes:
+        path = dataset_path(rows, data_dir, seed=seed)
+        for stage, seconds, peak in run_size(path, stages, trees=trees, train_rows=train_rows):
+            stage_rows = min(rows, train_rows) if stage in ("features", "train", "cv") else rows
+            record = {
+                "rows": rows,
+                "stage": stage,
+                "stage_rows": stage_rows,
+                "seconds": round(seconds, 4),
+                "rows_per_second": round(stage_rows / seconds) if seconds else None,
+                "peak_mb": round(peak / 2 ** 20, 1),
+            }
+            records.append(record)
+            if progress is not None:
+                progress(record)
+
+    document = {
+        "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "parameters": {"seed": seed, "trees": trees, "train_rows": train_rows},
+        "results": records,
+    }
+    if output:
+        with open(output, "w") as handle:
+            json.dump(document, handle, indent=2)
+    return document
+
+
+def compare_results(baseline, current):
+    """Side-by-side seconds and peak memory of two result documents (or paths)"""
+    frames = []
+    for label, document in (("baseline", baseline), ("current", current)):
+        if isinstance(document, (str, os.PathLike)):
+            with open(document) as handle:
+                document = json.load(handle)
+        frame = pd.DataFrame(document["results"]).set_index(["rows", "stage"])[["seconds", "peak_mb"]]
+        frames.append(frame.add_prefix(f"{label}_"))
+    merged = frames[0].join(frames[1], how="outer")
+    merged["speedup"] = merged["baseline_seconds"] / merged["current_seconds"]
+    merged["memory_ratio"] = merged["current_peak_mb"] / merged["baseline_peak_mb"].replace(0, np.nan)
+    return merged.reset_index()
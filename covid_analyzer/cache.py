@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+import warnings
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    pa = feather = None
+
+# Bump when cleaning/parsing changes so stale entries are not reused
+CACHE_VERSION = 3
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "COVID_ANALYZER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "covid_analyzer", "datasets"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("COVID_ANALYZER_CACHE_MB", "2048")) * 1024 * 1024
+
+_HASH_BLOCK = 8 * 1024 * 1024
+# Temporary files older than this were left by a crashed write, not one in progress
+STALE_TMP_SECONDS = 3600
+
+
+def content_hash(source):
+    """BLAKE2b digest of a path, bytes or file-like object, read in blocks"""
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+        return digest.hexdigest()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as handle:
+            return content_hash(handle)
+    if hasattr(source, "getbuffer"):
+        # BytesIO / UploadedFile: hash the buffer without copying it
+        digest.update(source.getbuffer())
+        return digest.hexdigest()
+    position = source.tell()
+    source.seek(0)
+    for block in iter(lambda: source.read(_HASH_BLOCK), b""):
+        digest.update(block)
+    source.seek(position)
+    return digest.hexdigest()
+
+
+def cache_key(digest, **options):
+    """Combine a content hash with the load options that change the result"""
+    parts = [f"v{CACHE_VERSION}", digest] + [f"{name}={options[name]}" for name in sorted(options)]
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=20).hexdigest()
+
+
+class DatasetCache:
+    """Content-addressed store of cleaned frames as uncompressed Arrow/Feather files.
+
+    Files are memory-mapped on read, so a hit costs little more than the
+    metadata decode. Entries are evicted least-recently-used first once the
+    directory grows beyond ``max_bytes``; last use is tracked via file mtime.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    @property
+    def available(self):
+        return feather is not None
+
+    def _data_path(self, key):
+        return os.path.join(self.root, f"{key}.feather")
+
+    def _meta_path(self, key):
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached frame for ``key`` or None"""
+        path = self._data_path(key)
+        if not self.available or not os.path.exists(path):
+            return None
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except (OSError, pa.ArrowException):
+            # Half-written or corrupt entry: drop it and treat as a miss
+            self.remove(key)
+            return None
+        os.utime(path)
+        return table.to_pandas()
+
+    def put(self, key, df, name=None):
+        """Store ``df`` under ``key`` and evict old entries if over budget.
+
+        The cache only saves a later parse, so a frame Arrow cannot encode
+        (e.g. an object column mixing numbers and strings) or a directory
+        that cannot be written produces a warning instead of an error.
+        Returns True if the entry was written.
+        """
+        if not self.available:
+            return False
+        path = self._data_path(key)
+        # Unique per write: sessions of one process may store the same key at once
+        tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            feather.write_feather(df.reset_index(drop=True), tmp_path, compression="uncompressed")
+            os.replace(tmp_path, path)
+            with open(self._meta_path(key), "w") as handle:
+                json.dump({"name": name, "rows": int(df.shape[0]), "columns": int(df.shape[1]),
+                           "created": time.time()}, handle)
+        except (OSError, pa.ArrowException) as e:
+            warnings.warn(f"Could not write the dataset cache in {self.root}: {e}", stacklevel=2)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        self.evict()
+        return True
+
+    def remove(self, key):
+        for path in (self._data_path(key), self._meta_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def entries(self):
+        """Cached datasets, most recently used first"""
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=["key", "name", "rows", "columns", "bytes", "last_used"])
+        records = []
+        for filename in os.listdir(self.root):
+            if not filename.endswith(".feather"):
+                continue
+            key = filename[: -len(".feather")]
+            stat = os.stat(os.path.join(self.root, filename))
+            meta = {}
+            try:
+                with open(self._meta_path(key)) as handle:
+                    meta = json.load(handle)
+            except (OSError, ValueError):
+                pass
+            records.append({
+                "key": key,
+                "name": meta.get("name"),
+                "rows": meta.get("rows"),
+                "columns": meta.get("columns"),
+                "bytes": stat.st_size,
+                "last_used": pd.Timestamp(stat.st_mtime, unit="s"),
+            })
+        frame = pd.DataFrame(records, columns=["key", "name", "rows", "columns", "bytes", "last_used"])
+        return frame.sort_values("last_used", ascending=False, ignore_index=True)
+
+    def total_bytes(self):
+        return int(self.entries()["bytes"].sum())
+
+    def sweep_tmp(self, max_age=STALE_TMP_SECONDS):
+        """Delete temporary files of writes that never finished"""
+        if not os.path.isdir(self.root):
+            return
+        cutoff = time.time() - max_age
+        for filename in os.listdir(self.root):
+            if not filename.endswith(".tmp"):
+                continue
+            path = os.path.join(self.root, filename)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def evict(self):
+        """Delete least-recently-used entries until the cache fits in ``max_bytes``"""
+        self.sweep_tmp()
+        entries = self.entries()
+        total = entries["bytes"].sum()
+        for key, size in zip(entries["key"][::-1], entries["bytes"][::-1]):
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= size
+
+    def clear(self):
+        for key in self.entries()["key"]:
+            self.remove(key)
@@ -0,0 +1,179 @@
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .dates import parse_dates, precision_column
+
+# Column kinds produced by the inference engine
+NUMERIC = "numeric"
+DATE = "date"
+CATEGORICAL = "categorical"
+STRING = "string"
+
+# Values that mean "missing" in NCBI exports and spreadsheets
+NULL_TOKENS = ["", "nan", "NaN", "None", "null", "NULL", "NA", "N/A"]
+
+
+def _sample(series, sample_size):
+    """Evenly spaced, non-null sample so sorted files don't fool the inference"""
+    if len(series) > sample_size * 4:
+        series = series.iloc[np.linspace(0, len(series) - 1, sample_size * 4).astype(np.int64)]
+    values = series.dropna()
+    values = values[~values.isin(NULL_TOKENS)]
+    if len(values) > sample_size:
+        values = values.iloc[np.linspace(0, len(values) - 1, sample_size).astype(np.int64)]
+    return values
+
+
+def classify_column(series, sample_size=5000, max_category_ratio=0.5, max_categories=50000):
+    """Decide the target kind of a single column from a sample of its values"""
+    if pd.api.types.is_numeric_dtype(series):
+        return NUMERIC
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return DATE
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return CATEGORICAL
+
+    sample = _sample(series, sample_size)
+    if sample.empty:
+        return STRING
+
+    # Numeric only when every sampled value parses, so IDs like "DE-123" stay text
+    if pd.to_numeric(sample, errors="coerce").notna().all():
+        return NUMERIC
+
+    text = sample.astype(str)
+    # Every supported date layout starts with a digit; skip the parse otherwise
+    if text.str.match(r"\d").all() and parse_dates(text).notna().all():
+        return DATE
+
+    distinct = text.nunique()
+    if distinct <= max_categories and distinct <= max(1, int(len(text) * max_category_ratio)):
+        return CATEGORICAL
+    return STRING
+
+
+def dates_parse(series, sample_size=5000):
+    """Whether most sampled values of a text column parse with the column's date formats"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return True
+    sample = _sample(series, sample_size)
+    return sample.empty or parse_dates(sample.astype(str).rename(series.name)).notna().mean() >= 0.5
+
+
+def infer_schema(df, sample_size=5000, max_category_ratio=0.5, max_categories=50000, known=None):
+    """Classify every column once from a sample; returns {column: kind}
+
+    Columns listed in ``known`` keep their declared kind and are not sampled,
+    except that a declared date column whose values mostly do not parse is
+    kept as text rather than turned into missing dates.
+    """
+    known = known or {}
+    schema = {}
+    for col in df.columns:
+        kind = known.get(col)
+        if kind == DATE and not dates_parse(df[col], sample_size):
+            warnings.warn(f"{col} is declared as a date but its values do not parse; keeping it as text",
+                          stacklevel=2)
+            kind = STRING
+        schema[col] = kind or classify_column(df[col], sample_size, max_category_ratio, max_categories)
+    return schema
+
+
+def convert_column(series, kind):
+    """Convert a column to its inferred kind in a single pass"""
+    if kind == NUMERIC:
+        if pd.api.types.is_numeric_dtype(series):
+            return series
+        return pd.to_numeric(series, errors="coerce")
+
+    if kind == DATE:
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        return parse_dates(series)
+
+    if kind == CATEGORICAL:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categorical = series
+        else:
+            categorical = series.astype("category")
+        # Fix up categories, not rows: this only touches the distinct values
+        categories = categorical.cat.categories
+        if not all(isinstance(c, str) for c in categories):
+            labels = pd.Index([str(c) for c in categories])
+            if labels.has_duplicates:
+                return series.astype(str).astype("category")
+            categorical = categorical.cat.rename_categories(labels)
+        nulls = [c for c in NULL_TOKENS if c in categorical.cat.categories]
+        if nulls:
+            categorical = categorical.cat.remove_categories(nulls)
+        return categorical
+
+    # Plain text: one conversion to the nullable string dtype keeps missing values as <NA>
+    if isinstance(series.dtype, pd.StringDtype):
+        return series
+    return series.astype("string")
+
+
+def convert_date_column(series):
+    """Parse a date column and, if it accepts truncated layouts, the precision of each value.
+
+    Returns ``(dates, precision)``; ``precision`` is None for columns that are
+    never truncated or are already parsed.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series, None
+    if precision_column(series.name) is None:
+        return parse_dates(series), None
+    return parse_dates(series, precision=True)
+
+
+def unparsed_dates(original, dates):
+    """How many present values of ``original`` did not parse into ``dates``"""
+    return int((dates.isna() & original.notna()).sum())
+
+
+def warn_unparsed(col, count):
+    if count:
+        warnings.warn(f"{count:,} values of {col} are not dates in a known layout and became missing",
+                      stacklevel=3)
+
+
+def clean_dataframe(df, schema=None, parallel=False, max_workers=None, sample_size=5000, known=None):
+    """Convert every column exactly once according to the inferred schema.
+
+    The frame is updated column by column instead of being copied as a whole.
+    With ``parallel=True`` the per-column work runs on a thread pool; pandas
+    releases the GIL in most of the parsing kernels so this scales with cores.
+    Date columns that may be truncated get a categorical precision column
+    (see :func:`~covid_analyzer.dates.precision_column`) added after them.
+    """
+    if schema is None:
+        schema = infer_schema(df, sample_size=sample_size, known=known)
+
+    def work(col):
+        original = df[col]
+        if schema[col] == DATE:
+            return (col, original, *convert_date_column(original))
+        return col, original, convert_column(original, schema[col]), None
+
+    columns = [col for col in df.columns if col in schema]
+    if parallel and len(columns) > 1:
+        workers = max_workers or min(len(columns), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            converted = list(pool.map(work, columns))
+    else:
+        converted = [work(col) for col in columns]
+
+    for col, original, values, precision in converted:
+        if schema[col] == DATE:
+            warn_unparsed(col, unparsed_dates(original, values))
+        if values is not original:
+            df[col] = values
+        if precision is not None and precision_column(col) not in df.columns:
+            df.insert(df.columns.get_loc(col) + 1, precision_column(col), precision)
+    return df
+
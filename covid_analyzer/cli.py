@@ -0,0 +1,336 @@
+"""Command-line entry point: run one analysis stage headless on a file.
+
+Examples::
+
+    python -m covid_analyzer missing dataset.csv
+    python -m covid_analyzer profile big.csv --streaming
+    python -m covid_analyzer groupby dataset.csv --by Country --bucket Month
+    python -m covid_analyzer groupby dataset.csv --by Country --column Length --operation mean median nunique
+    python -m covid_analyzer lineages dataset.csv --depth 5
+    python -m covid_analyzer prevalence new.csv --cube cube.npz --country USA --top 10
+    python -m covid_analyzer train dataset.csv --trees 200 --lineage-depth 5 --save
+    python -m covid_analyzer score new.csv --model-id 20250101-120000-abc123 --output predictions.csv
+    python -m covid_analyzer generate synthetic.csv --rows 1000000
+    python -m covid_analyzer bench --sizes 10000 100000 --output results.json --baseline previous.json
+
+Results go to stdout (or ``--output`` as CSV); per-stage timings go to stderr.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from .analysis import (
+    COUNT,
+    OPERATIONS,
+    correlation,
+    group_by,
+    high_correlations,
+    missing_summary,
+    outlier_summary,
+)
+from .correlation import METHODS, streaming_correlation
+from .cube import PrevalenceCube
+from .dates import BUCKETS, build_time_indexes
+from .features import HASHING, ONEHOT, EncodingConfig, prepare_features
+from .ingest import DEFAULT_CHUNKSIZE, iter_clean_chunks, load_dataset
+from .lineages import LineageTrie
+from .registry import ModelRegistry
+from .scoring import score_csv
+from .summary import profile_csv, profile_frame
+from .synthetic import write_dataset
+from .training import DROP, GROUP, MERGE, cross_validate_forest, train_forest
+
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    yield
+    print(f"[{name}] {time.perf_counter() - started:.3f}s", file=sys.stderr)
+
+
+def _emit(frame, output):
+    if output:
+        frame.to_csv(output, index=False)
+    else:
+        print(frame.to_string(index=False))
+
+
+def _load(args):
+    with stage("load"):
+        df = load_dataset(args.file, streaming=args.streaming, chunksize=args.chunksize, nrows=args.nrows,
+                          parallel=args.parallel)
+    print(f"[rows] {len(df):,} x {df.shape[1]}", file=sys.stderr)
+    if getattr(args, "lineage_depth", None) and "Pangolin" in df.columns:
+        with stage("lineages"):
+            df["Pangolin"] = LineageTrie(df["Pangolin"]).rollup(df["Pangolin"], args.lineage_depth)
+        print(f"[lineages] {df['Pangolin'].nunique():,} at depth {args.lineage_depth}", file=sys.stderr)
+    return df
+
+
+def cmd_info(args):
+    df = _load(args)
+    with stage("describe"):
+        summary = df.describe(include="all").T.reset_index(names="column")
+    _emit(summary, args.output)
+
+
+def cmd_profile(args):
+    if args.streaming:
+        # Sketches are updated chunk by chunk; the file is never held in memory
+        with stage("profile"):
+            profile = profile_csv(args.file, chunksize=args.chunksize, nrows=args.nrows)
+    else:
+        df = _load(args)
+        with stage("profile"):
+            profile = profile_frame(df)
+    _emit(profile.frame(), args.output)
+
+
+def cmd_missing(args):
+    df = _load(args)
+    with stage("missing"):
+        summary = missing_summary(df)
+    _emit(summary, args.output)
+
+
+def cmd_groupby(args):
+    df = _load(args)
+    with stage("index"):
+        time_indexes = build_time_indexes(df)
+    date_range = (args.start, args.end) if args.start and args.end else None
+    with stage("groupby"):
+        operation = args.operation[0] if len(args.operation) == 1 else args.operation
+        result = group_by(df, args.by, args.column, operation, time_indexes=time_indexes, bucket=args.bucket,
+                          date_range=date_range)
+    _emit(result, args.output)
+
+
+def cmd_lineages(args):
+    df = _load(args)
+    with stage("lineages"):
+        trie = LineageTrie(df["Pangolin"])
+        counts = trie.counts_at(args.depth).reset_index()
+    _emit(counts, args.output)
+    print(f"[lineages] {len(counts):,} at depth {args.depth} (from {len(trie.paths):,}, max depth {trie.max_depth})",
+          file=sys.stderr)
+
+
+def cmd_prevalence(args):
+    # An existing cube is extended with the rows of the file instead of being rebuilt
+    cube = PrevalenceCube.load(args.cube) if args.cube and os.path.exists(args.cube) else PrevalenceCube()
+    if args.streaming:
+        with stage("cube"):
+            for chunk, _ in iter_clean_chunks(args.file, chunksize=args.chunksize, nrows=args.nrows,
+                                              usecols=cube.columns):
+                cube.update(chunk)
+    else:
+        df = _load(args)
+        with stage("cube"):
+            cube.update(df)
+    if args.cube:
+        with stage("save"):
+            cube.save(args.cube)
+    trie = LineageTrie(pd.Series(cube.lineages)) if args.depth else None
+    with stage("prevalence"):
+        result = cube.prevalence(args.country, top_n=args.top, trie=trie, depth=args.depth)
+    _emit(result, args.output)
+    print(f"[cube] {len(cube):,} cells from {cube.rows:,} rows ({cube.skipped:,} skipped: "
+          f"{cube.truncated:,} dated only to the month or year, the rest without date, country or lineage)",
+          file=sys.stderr)
+
+
+def cmd_corr(args):
+    if args.streaming and args.method == "pearson":
+        # Running sums per chunk: the file is never held in memory
+        with stage("correlation"):
+            corr = streaming_correlation(args.file, chunksize=args.chunksize, nrows=args.nrows,
+                                         pairwise=not args.complete)
+    else:
+        df = _load(args)
+        with stage("correlation"):
+            corr = correlation(df, method=args.method, pairwise=not args.complete)
+    pairs = high_correlations(corr, threshold=args.threshold)
+    _emit(corr.reset_index(names="column"), args.output)
+    for col1, col2, value in pairs:
+        print(f"high: {col1} ~ {col2} = {value:.3f}", file=sys.stderr)
+
+
+def cmd_outliers(args):
+    df = _load(args)
+    with stage("outliers"):
+        summary = outlier_summary(df, factor=args.factor)
+    _emit(summary, args.output)
+
+
+def _features(args, df):
+    with stage("features"):
+        return prepare_features(df, target=args.target, config=EncodingConfig(method=args.encoding))
+
+
+def cmd_train(args):
+    df = _load(args)
+    features = _features(args, df)
+    with stage("train"):
+        model, history = train_forest(features.X_train, features.y_train, n_estimators=args.trees,
+                                      batch_size=args.batch_size, n_jobs=args.jobs,
+                                      time_budget=args.time_budget)
+    with stage("evaluate"):
+        y_pred = model.predict(features.X_test)
+        accuracy = float((y_pred == features.y_test.to_numpy()).mean())
+    metrics = {"accuracy": accuracy, "oob_score": history[-1]["oob_score"], "trees": int(model.n_estimators),
+               "seconds": history[-1]["seconds"]}
+    if args.save:
+        with stage("save"):
+            metrics["model_id"] = ModelRegistry().save(
+                model, features.schema, config=features.config, metrics=dict(metrics),
+                evaluation={"y_test": features.y_test, "y_pred": y_pred, "test_idx": features.test_idx},
+            )
+    print(json.dumps(metrics, indent=2))
+
+
+def cmd_cv(args):
+    df = _load(args)
+    features = _features(args, df)
+    groups = None
+    if args.strategy == GROUP:
+        groups = df[args.group_column].to_numpy()
+        groups = groups if features.rows is None else groups[features.rows]
+    with stage("cross-validate"):
+        results = cross_validate_forest(features.X, features.y, n_splits=args.folds, strategy=args.strategy,
+                                        groups=groups, n_jobs=args.jobs, n_estimators=args.trees)
+    _emit(results, args.output)
+    print(f"mean accuracy {results['score'].mean():.3f} ± {results['score'].std():.3f}", file=sys.stderr)
+
+
+def cmd_score(args):
+    with stage("load model"):
+        model, schema, _ = ModelRegistry().load(args.model_id)
+    with stage("score"):
+        stats = score_csv(args.file, model, schema, args.output, chunksize=args.chunksize, nrows=args.nrows,
+                          probabilities=not args.no_probabilities)
+    print(json.dumps(stats, indent=2))
+
+
+def cmd_generate(args):
+    with stage("generate"):
+        write_dataset(args.file, args.rows, seed=args.seed)
+    print(args.file)
+
+
+def cmd_bench(args):
+    from .benchmark import DEFAULT_DATA_DIR, STAGES, compare_results, run_benchmarks
+
+    def report(record):
+        print(f"{record['rows']:>10,} {record['stage']:<12} {record['seconds']:>9.3f}s {record['peak_mb']:>9.1f} MB",
+              file=sys.stderr)
+
+    document = run_benchmarks(args.sizes, stages=args.stages or STAGES, data_dir=args.data_dir or DEFAULT_DATA_DIR,
+                              output=args.output, seed=args.seed, trees=args.trees, train_rows=args.train_rows,
+                              progress=report)
+    if args.baseline:
+        print(compare_results(args.baseline, document).to_string(index=False))
+    elif not args.output:
+        print(json.dumps(document, indent=2))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m covid_analyzer",
+                                     description="Run COVID-19 analyzer stages without the web app.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def command(name, func, help):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument("file", help="CSV or Excel file")
+        sub.add_argument("--nrows", type=int, default=None, help="read only the first N rows")
+        sub.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+        sub.add_argument("--streaming", action="store_true", help="read CSV in chunks")
+        sub.add_argument("--parallel", action="store_true", help="clean columns on a thread pool")
+        sub.add_argument("--output", "-o", default=None, help="write the result table to this CSV")
+        sub.set_defaults(func=func)
+        return sub
+
+    command("info", cmd_info, "summary statistics per column")
+    command("profile", cmd_profile, "exact numeric stats, approximate distinct counts and top values")
+    command("missing", cmd_missing, "missing values per column")
+
+    sub = command("groupby", cmd_groupby, "group and aggregate")
+    sub.add_argument("--by", nargs="+", required=True, help="columns to group by")
+    sub.add_argument("--column", default=COUNT, help=f"column to aggregate (default: {COUNT} rows)")
+    sub.add_argument("--operation", nargs="+", choices=OPERATIONS, default=["count"],
+                     help="one or more aggregations, computed in one pass")
+    sub.add_argument("--bucket", choices=list(BUCKETS), default="Month", help="bucket for date keys")
+    sub.add_argument("--start", default=None, help="first date of the first date key")
+    sub.add_argument("--end", default=None, help="last date of the first date key")
+    sub.add_argument("--lineage-depth", type=int, default=None, help="roll Pangolin lineages up to this depth first")
+
+    sub = command("lineages", cmd_lineages, "Pangolin lineage counts rolled up to a depth of the Pango tree")
+    sub.add_argument("--depth", type=int, default=5, help="path components kept (B.1.1.529 = 4, BA.2 = 5)")
+
+    sub = command("prevalence", cmd_prevalence, "weekly lineage counts and shares from a week x country x lineage cube")
+    sub.add_argument("--cube", default=None, help="cube file (.npz) to extend with the rows of the file and save")
+    sub.add_argument("--country", nargs="+", default=None, help="countries to include (default: all)")
+    sub.add_argument("--top", type=int, default=10, help="lineages shown; the rest are combined into Other")
+    sub.add_argument("--depth", type=int, default=None, help="roll lineages up to this depth of the Pango tree")
+
+    sub = command("corr", cmd_corr, "correlation of numeric columns")
+    sub.add_argument("--threshold", type=float, default=0.8)
+    sub.add_argument("--method", choices=METHODS, default="pearson")
+    sub.add_argument("--complete", action="store_true",
+                     help="use only rows without missing values (default: pairwise)")
+
+    sub = command("outliers", cmd_outliers, "IQR outlier counts")
+    sub.add_argument("--factor", type=float, default=1.5)
+
+    for name, func, help in [("train", cmd_train, "train a Random Forest"),
+                             ("cv", cmd_cv, "cross-validate a Random Forest")]:
+        sub = command(name, func, help)
+        sub.add_argument("--target", default="Pangolin")
+        sub.add_argument("--encoding", choices=[ONEHOT, HASHING], default=ONEHOT)
+        sub.add_argument("--trees", type=int, default=100)
+        sub.add_argument("--jobs", type=int, default=-1)
+        sub.add_argument("--lineage-depth", type=int, default=None, help="train on Pangolin lineages rolled up to this depth")
+        if name == "train":
+            sub.add_argument("--batch-size", type=int, default=10)
+            sub.add_argument("--time-budget", type=float, default=None, help="seconds")
+            sub.add_argument("--save", action="store_true", help="store the model in the registry")
+        else:
+            sub.add_argument("--folds", type=int, default=5)
+            sub.add_argument("--strategy", choices=[MERGE, DROP, GROUP], default=MERGE)
+            sub.add_argument("--group-column", default="BioProject")
+
+    sub = command("score", cmd_score, "predict lineages with a saved model")
+    sub.add_argument("--model-id", required=True)
+    sub.add_argument("--no-probabilities", action="store_true", help="only write the top lineage")
+
+    sub = commands.add_parser("generate", help="write a synthetic NCBI metadata CSV")
+    sub.add_argument("file", help="CSV file to create")
+    sub.add_argument("--rows", type=int, default=100_000)
+    sub.add_argument("--seed", type=int, default=0)
+    sub.set_defaults(func=cmd_generate)
+
+    sub = commands.add_parser("bench", help="time every stage on synthetic data")
+    sub.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    sub.add_argument("--stages", nargs="+", default=None, help="subset of stages to run")
+    sub.add_argument("--data-dir", default=None,
+                     help="where generated files are kept (default: ~/.cache/covid_analyzer/benchmark)")
+    sub.add_argument("--output", "-o", default=None, help="write the results to this JSON file")
+    sub.add_argument("--baseline", default=None, help="earlier results JSON to compare against")
+    sub.add_argument("--seed", type=int, default=0)
+    sub.add_argument("--trees", type=int, default=10)
+    sub.add_argument("--train-rows", type=int, default=10_000, help="rows sampled for encoding and training")
+    sub.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "score" and not args.output:
+        args.output = sys.stdout
+    args.func(args)
+    return 0
@@ -0,0 +1,150 @@
+"""Correlation matrices from running sums, so they can be built chunk by chunk.
+
+Every chunk contributes matrix products of its (shifted) values and of its
+missing-value mask; the correlation is derived from those totals at the end.
+Memory therefore depends on the number of numeric columns only, and a file
+can be streamed through :func:`streaming_correlation` without loading it.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .ingest import DEFAULT_CHUNKSIZE, iter_clean_chunks
+from .schema import NCBI_SCHEMA
+
+METHODS = ["pearson", "spearman"]
+
+
+def numeric_columns(df):
+    return [col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+
+
+def average_ranks(values):
+    """Column-wise ranks (1-based, ties averaged) of a 2-D float array; NaN stays NaN"""
+    ranks = np.full(values.shape, np.nan)
+    for i in range(values.shape[1]):
+        rows = np.flatnonzero(~np.isnan(values[:, i]))
+        order = rows[np.argsort(values[rows, i], kind="stable")]
+        ordered = values[order, i]
+        # Runs of equal values share the mean of the positions they occupy
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]]) if len(ordered) else np.array([], dtype=np.int64)
+        lengths = np.diff(np.r_[starts, len(ordered)])
+        ranks[order, i] = np.repeat(starts + (lengths + 1) / 2, lengths)
+    return ranks
+
+
+class CorrelationAccumulator:
+    """One-pass Pearson correlation of numeric columns, fed with :meth:`update`.
+
+    With ``pairwise`` (the pandas default) every pair of columns uses the rows
+    where both are present; otherwise only rows without any missing value
+    count. Values are shifted by the first chunk's column means before they
+    are summed, which keeps the running sums small and the result accurate.
+    """
+
+    def __init__(self, columns=None, pairwise=True):
+        self.columns = None if columns is None else list(columns)
+        self.pairwise = pairwise
+        self.rows = 0
+        self._shift = None
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = numeric_columns(chunk)
+        values = chunk[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        present = ~np.isnan(values)
+        if not self.pairwise:
+            complete = present.all(axis=1)
+            values, present = values[complete], present[complete]
+        if self._shift is None:
+            self._shift = np.where(present, values, 0).sum(axis=0) / np.maximum(present.sum(axis=0), 1)
+            k = len(self.columns)
+            self._n = np.zeros((k, k))
+            self._sum = np.zeros((k, k))
+            self._squares = np.zeros((k, k))
+            self._products = np.zeros((k, k))
+        centered = np.where(present, values - self._shift, 0.0)
+        mask = present.astype(np.float64)
+        # Entry [i, j] sums over the rows where both column i and column j are present
+        self._n += mask.T @ mask
+        self._sum += centered.T @ mask
+        self._squares += (centered ** 2).T @ mask
+        self._products += centered.T @ centered
+        self.rows += len(chunk)
+        return self
+
+    def result(self):
+        """Correlation matrix as a DataFrame (NaN where a pair has no variance)"""
+        columns = self.columns or []
+        if self._shift is None:
+            return pd.DataFrame(np.full((len(columns), len(columns)), np.nan), index=columns, columns=columns)
+        n, sx, sy = self._n, self._sum, self._sum.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            covariance = n * self._products - sx * sy
+            variance_x = n * self._squares - sx ** 2
+            variance_y = (n * self._squares - sx ** 2).T
+            corr = covariance / np.sqrt(variance_x * variance_y)
+        corr[(n < 2) | (variance_x <= 0) | (variance_y <= 0)] = np.nan
+        return pd.DataFrame(np.clip(corr, -1, 1), index=columns, columns=columns)
+
+
+def _spearman(values, columns, pairwise):
+    """Spearman correlation of a 2-D float array, ranking over the rows each pair uses"""
+    present = ~np.isnan(values)
+    if not pairwise:
+        values = values[present.all(axis=1)]
+        present = present[present.all(axis=1)]
+    ranks = average_ranks(values)
+    complete = present.all(axis=0)
+    corr = np.full((len(columns), len(columns)), np.nan)
+    if complete.any():
+        # Columns without gaps share their rows with each other, so one ranking serves all their pairs
+        inner = np.flatnonzero(complete)
+        block = CorrelationAccumulator(inner, pairwise=False).update(pd.DataFrame(ranks[:, inner], columns=inner))
+        corr[np.ix_(inner, inner)] = block.result().to_numpy()
+    for i in np.flatnonzero(~complete):
+        for j in range(len(columns)):
+            if j < i and not complete[j]:
+                continue
+            # Re-rank both columns over the rows where both are present
+            both = present[:, i] & present[:, j]
+            pair = average_ranks(values[both][:, [i, j]])
+            corr[i, j] = corr[j, i] = (
+                CorrelationAccumulator([0, 1], pairwise=False).update(pd.DataFrame(pair)).result().iat[0, 1]
+            )
+    return pd.DataFrame(corr, index=columns, columns=columns)
+
+
+def correlation_matrix(df, method="pearson", pairwise=True):
+    """Pearson or Spearman correlation of the numeric columns of an in-memory frame.
+
+    Spearman ranks (average ranks for ties) over exactly the rows each pair
+    uses: with ``pairwise`` a column with gaps is re-ranked for every partner,
+    otherwise the complete rows are ranked once. Both match pandas.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown correlation method {method!r}; use one of {METHODS}")
+    columns = numeric_columns(df)
+    if method == "spearman":
+        return _spearman(df[columns].to_numpy(dtype=np.float64, na_value=np.nan), columns, pairwise)
+    return CorrelationAccumulator(columns, pairwise=pairwise).update(df[columns]).result()
+
+
+def streaming_correlation(source, chunksize=DEFAULT_CHUNKSIZE, nrows=None, pairwise=True, schema=NCBI_SCHEMA):
+    """Pearson correlation of a CSV's numeric columns, read one chunk at a time.
+
+    Spearman needs the ranks of whole columns and is not available here.
+    """
+    usecols = None
+    if isinstance(source, (str, os.PathLike)):
+        # Classify the columns on a small sample, then parse only the numeric ones
+        for sample, _ in iter_clean_chunks(source, chunksize=1000, schema=schema, nrows=1000):
+            usecols = numeric_columns(sample)
+            break
+    accumulator = CorrelationAccumulator(usecols, pairwise=pairwise)
+    for chunk, _ in iter_clean_chunks(source, chunksize=chunksize, schema=schema, nrows=nrows, usecols=usecols):
+        accumulator.update(chunk)
+    return accumulator.result()
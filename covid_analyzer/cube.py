@@ -0,0 +1,190 @@
+"""Sequence counts per (week, country, lineage), kept as a sparse cube.
+
+Only cells that occur are stored, as parallel arrays sorted by cell, so the
+cube stays small however many week/country/lineage combinations are
+possible. It is built in one vectorized pass, :meth:`PrevalenceCube.update`
+folds new rows into the existing cells without revisiting the rows counted
+before, and lineage prevalence over time is read from the cells instead of
+the dataset.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from .dates import DAY, _as_days, _bucket_days, precision_column
+from .groupby import key_codes
+
+DATE_COLUMN, COUNTRY_COLUMN, LINEAGE_COLUMN = "Collection_Date", "Country", "Pangolin"
+OTHER = "Other"
+
+
+def has_cube_columns(df, date_column=DATE_COLUMN, country_column=COUNTRY_COLUMN, lineage_column=LINEAGE_COLUMN):
+    """Whether ``df`` has the parsed date, country and lineage columns a cube is built from"""
+    return (all(col in df.columns for col in [date_column, country_column, lineage_column])
+            and pd.api.types.is_datetime64_any_dtype(df[date_column]))
+
+
+class PrevalenceCube:
+    """Rows per (week, country, lineage), fed with :meth:`update`.
+
+    Weeks start on Monday and are stored as day numbers. Countries and
+    lineages get codes in the order they are first seen, so codes stay valid
+    as rows are appended. Rows without a date, country or lineage are
+    counted in ``skipped``. So are dates known only to the month or year
+    (from the date's precision column), which would otherwise all land in
+    the week of the first day; ``truncated`` counts those separately.
+    """
+
+    def __init__(self, date_column=DATE_COLUMN, country_column=COUNTRY_COLUMN, lineage_column=LINEAGE_COLUMN):
+        self.date_column = date_column
+        self.country_column = country_column
+        self.lineage_column = lineage_column
+        self.countries, self.lineages = [], []
+        self._codes = {"country": {}, "lineage": {}}
+        self.weeks = np.array([], dtype=np.int64)
+        self.country = np.array([], dtype=np.int64)
+        self.lineage = np.array([], dtype=np.int64)
+        self.count = np.array([], dtype=np.int64)
+        self.rows = 0
+        self.skipped = 0
+        self.truncated = 0
+
+    @classmethod
+    def from_frame(cls, df, **columns):
+        return cls(**columns).update(df)
+
+    @property
+    def columns(self):
+        return [self.date_column, self.country_column, self.lineage_column]
+
+    def __len__(self):
+        return len(self.count)
+
+    def _encode(self, series, labels, codes):
+        """Codes of ``series`` in the cube's growing vocabulary (-1 = missing)"""
+        local, values = key_codes(series)
+        observed = np.bincount(local[local >= 0], minlength=len(values)) > 0
+        # Trailing slot: local code -1 (missing) maps to -1
+        lookup = np.full(len(values) + 1, -1, dtype=np.int64)
+        for i in np.flatnonzero(observed):
+            label = str(values[i])
+            if label not in codes:
+                codes[label] = len(labels)
+                labels.append(label)
+            lookup[i] = codes[label]
+        return lookup[local]
+
+    def update(self, df):
+        """Add the rows of ``df``; the work depends on its rows and the existing cells, not on earlier rows"""
+        days, missing = _as_days(df[self.date_column].to_numpy())
+        precision = df.get(precision_column(self.date_column))
+        truncated = np.zeros(len(df), dtype=bool) if precision is None else (~missing & (precision != DAY).to_numpy())
+        country = self._encode(df[self.country_column], self.countries, self._codes["country"])
+        lineage = self._encode(df[self.lineage_column], self.lineages, self._codes["lineage"])
+        valid = ~missing & ~truncated & (country >= 0) & (lineage >= 0)
+        self.rows += len(df)
+        self.skipped += int(len(df) - valid.sum())
+        self.truncated += int(truncated.sum())
+
+        weeks = np.concatenate([self.weeks, _bucket_days(days[valid], "W")])
+        country = np.concatenate([self.country, country[valid]])
+        lineage = np.concatenate([self.lineage, lineage[valid]])
+        count = np.concatenate([self.count, np.ones(int(valid.sum()), dtype=np.int64)])
+        if not len(count):
+            return self
+        # One int64 per cell: week offset, then country, then lineage
+        first = weeks.min()
+        n_countries, n_lineages = max(len(self.countries), 1), max(len(self.lineages), 1)
+        cells = ((weeks - first) // 7 * n_countries + country) * n_lineages + lineage
+        cells, inverse = np.unique(cells, return_inverse=True)
+        self.count = np.bincount(inverse, weights=count).astype(np.int64)
+        self.lineage = cells % n_lineages
+        self.country = cells // n_lineages % n_countries
+        self.weeks = cells // (n_lineages * n_countries) * 7 + first
+        return self
+
+    def frame(self):
+        """The cells as a frame: week, country, lineage, count"""
+        return pd.DataFrame({
+            "week": self.weeks.astype("datetime64[D]").astype("datetime64[ns]"),
+            "country": pd.Categorical.from_codes(self.country, categories=self.countries),
+            "lineage": pd.Categorical.from_codes(self.lineage, categories=self.lineages),
+            "count": self.count,
+        })
+
+    def country_totals(self):
+        """Rows per country, largest first"""
+        totals = np.bincount(self.country, weights=self.count, minlength=len(self.countries)).astype(np.int64)
+        return pd.Series(totals, index=self.countries, name="count").sort_values(ascending=False, kind="stable")
+
+    def prevalence(self, countries=None, top_n=10, trie=None, depth=None, other=OTHER):
+        """Weekly count and share (%) of every lineage, one row per (week, lineage).
+
+        Only the cells of ``countries`` (default: all) are summed. Lineages
+        are rolled up to ``depth`` through a :class:`~covid_analyzer.lineages.LineageTrie`
+        when one is given; all but the ``top_n`` largest are combined into ``other``.
+        """
+        selected = np.ones(len(self), dtype=bool)
+        if countries:
+            wanted = [self._codes["country"][country] for country in countries if country in self._codes["country"]]
+            selected = np.isin(self.country, wanted)
+        weeks, lineage, count = self.weeks[selected], self.lineage[selected], self.count[selected]
+
+        names = np.asarray(self.lineages, dtype=object)
+        if trie is not None and depth:
+            # Roll up the vocabulary, not the cells
+            names, codes = np.unique(np.asarray([trie.ancestor(label, depth) for label in self.lineages] or [""],
+                                                dtype=object), return_inverse=True)
+            lineage = codes[lineage]
+        totals = np.bincount(lineage, weights=count, minlength=len(names))
+        order = np.argsort(-totals, kind="stable")
+        keep = order[:top_n][totals[order[:top_n]] > 0]
+        group = np.full(len(names), len(keep), dtype=np.int64)
+        group[keep] = np.arange(len(keep))
+        labels = list(names[keep]) + ([other] if len(keep) < np.count_nonzero(totals) else [])
+
+        week_values, week_codes = np.unique(weeks, return_inverse=True)
+        table = np.bincount(week_codes * (len(keep) + 1) + group[lineage], weights=count,
+                            minlength=len(week_values) * (len(keep) + 1)).reshape(len(week_values), len(keep) + 1)
+        table = table[:, :len(labels)]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = 100 * table / table.sum(axis=1, keepdims=True)
+        return pd.DataFrame({
+            "week": np.repeat(week_values, len(labels)).astype("datetime64[D]").astype("datetime64[ns]"),
+            "lineage": np.tile(np.asarray(labels, dtype=object), len(week_values)),
+            "count": table.ravel().astype(np.int64),
+            "share": share.ravel(),
+        })
+
+    @property
+    def nbytes(self):
+        return self.weeks.nbytes + self.country.nbytes + self.lineage.nbytes + self.count.nbytes
+
+    def save(self, path):
+        """Write the cube to an ``.npz`` file, to be extended later with :meth:`load` and :meth:`update`"""
+        meta = {
+            "columns": self.columns,
+            "countries": self.countries,
+            "lineages": self.lineages,
+            "rows": self.rows,
+            "skipped": self.skipped,
+            "truncated": self.truncated,
+        }
+        with open(path, "wb") as handle:
+            np.savez_compressed(handle, weeks=self.weeks, country=self.country, lineage=self.lineage,
+                                count=self.count, meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            cube = cls(*meta["columns"])
+            cube.weeks, cube.country, cube.lineage, cube.count = (
+                data[name].astype(np.int64) for name in ["weeks", "country", "lineage", "count"])
+        cube.countries, cube.lineages = meta["countries"], meta["lineages"]
+        cube._codes = {"country": {label: code for code, label in enumerate(cube.countries)},
+                       "lineage": {label: code for code, label in enumerate(cube.lineages)}}
+        cube.rows, cube.skipped, cube.truncated = meta["rows"], meta["skipped"], meta.get("truncated", 0)
+        return cube
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+# ISO dates and the UTC timestamps current NCBI Virus exports write
+ISO_FORMATS = ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%S"]
+
+# Date layouts seen in NCBI Virus exports, tried in order. Spreadsheet exports
+# write dd-mm-yyyy, the download API writes ISO; Collection_Date may be truncated
+# to yyyy-mm or yyyy, which resolve to the first day of the month or year.
+DATE_FORMATS = ["%d-%m-%Y", *ISO_FORMATS, "%Y-%m", "%Y", "%d/%m/%Y"]
+
+COLUMN_FORMATS = {
+    "Release_Date": ["%d-%m-%Y", *ISO_FORMATS],
+    "Collection_Date": ["%d-%m-%Y", *ISO_FORMATS, "%Y-%m", "%Y"],
+}
+
+BUCKETS = {"Day": "D", "Week": "W", "Month": "M", "Year": "Y"}
+
+# What a parsed date actually pins down; truncated layouts only name a month or year
+DAY, MONTH, YEAR = "day", "month", "year"
+PRECISIONS = [DAY, MONTH, YEAR]
+FORMAT_PRECISION = {"%Y-%m": MONTH, "%Y": YEAR}
+# Companion column holding the precision of a date column that accepts truncated layouts
+PRECISION_SUFFIX = "_Precision"
+
+
+def column_formats(name):
+    return COLUMN_FORMATS.get(name, DATE_FORMATS)
+
+
+def precision_column(name):
+    """Name of the precision column kept next to date column ``name``, or None if it is never truncated"""
+    if any(fmt in FORMAT_PRECISION for fmt in column_formats(name)):
+        return f"{name}{PRECISION_SUFFIX}"
+    return None
+
+
+def _parse_formats(values, formats):
+    """Parse an array of strings with explicit formats, retrying only the leftovers.
+
+    Returns the parsed dates and the index of the format each value matched (-1 = none).
+    """
+    values = pd.Series(values, dtype=object)
+    result = pd.to_datetime(values, format=formats[0], errors="coerce")
+    matched = np.where(result.notna(), 0, -1)
+    for i, fmt in enumerate(formats[1:], start=1):
+        pending = result.isna() & values.notna()
+        if not pending.any():
+            break
+        result[pending] = pd.to_datetime(values[pending], format=fmt, errors="coerce")
+        matched[(pending & result.notna()).to_numpy()] = i
+    return result, matched
+
+
+def parse_dates(series, formats=None, precision=False):
+    """Parse a text date column into datetime64 with fixed formats.
+
+    Dates repeat heavily in NCBI exports, so the distinct strings are parsed
+    once and broadcast back to the rows through their factorized codes. With
+    ``precision`` a categorical of :data:`PRECISIONS` (missing where the
+    value did not parse) is returned as well.
+    """
+    if formats is None:
+        formats = column_formats(series.name)
+    codes, uniques = pd.factorize(series)
+    parsed, matched = _parse_formats(np.asarray(uniques, dtype=object), formats)
+    parsed = parsed.to_numpy()
+    # Missing rows have code -1, which picks the trailing NaT
+    lookup = np.append(parsed, np.array(["NaT"], dtype=parsed.dtype))
+    dates = pd.Series(lookup[codes], index=series.index, name=series.name)
+    if not precision:
+        return dates
+    levels = np.array([PRECISIONS.index(FORMAT_PRECISION.get(fmt, DAY)) for fmt in formats] + [-1])
+    # Unmatched formats (-1) and missing rows (-1) both pick the trailing -1
+    level_codes = np.append(levels[matched], -1)[codes]
+    return dates, pd.Series(pd.Categorical.from_codes(level_codes, categories=PRECISIONS), index=series.index)
+
+
+def _as_days(values):
+    """datetime64 values as int64 day numbers; NaT stays NaT in the returned mask"""
+    days = np.asarray(values).astype("datetime64[D]")
+    return days.astype(np.int64), np.isnat(days)
+
+
+def _bucket_days(days, freq):
+    """Truncate int64 day numbers to the start of their day/week/month/year"""
+    if freq == "D":
+        return days
+    if freq == "W":
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        return days - (days + 3) % 7
+    unit = "datetime64[M]" if freq == "M" else "datetime64[Y]"
+    return days.astype("datetime64[D]").astype(unit).astype("datetime64[D]").astype(np.int64)
+
+
+class TimeIndex:
+    """Sorted index over one datetime column.
+
+    Row positions are kept in date order so range filters are two binary
+    searches and bucket counts are run lengths over an already sorted array.
+    """
+
+    def __init__(self, series):
+        self.name = series.name
+        self.length = len(series)
+        days, missing = _as_days(series.to_numpy())
+        self.days = days
+        self.missing = missing
+        valid = np.flatnonzero(~missing)
+        self.order = valid[np.argsort(days[valid], kind="stable")]
+        self.sorted_days = days[self.order]
+
+    @property
+    def bounds(self):
+        """(first, last) date in the column, or (None, None) when empty"""
+        if not len(self.sorted_days):
+            return None, None
+        first, last = self.sorted_days[[0, -1]].astype("datetime64[D]")
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def positions(self, start=None, end=None):
+        """Row positions with start <= date <= end, in date order"""
+        lo = 0 if start is None else np.searchsorted(self.sorted_days, _day(start), side="left")
+        hi = len(self.sorted_days) if end is None else np.searchsorted(self.sorted_days, _day(end), side="right")
+        return self.order[lo:hi]
+
+    def mask(self, start=None, end=None):
+        """Boolean row mask for start <= date <= end"""
+        mask = np.zeros(self.length, dtype=bool)
+        mask[self.positions(start, end)] = True
+        return mask
+
+    def bucket(self, freq="W"):
+        """Per-row bucket start dates (NaT for missing) as a datetime Series"""
+        freq = BUCKETS.get(freq, freq)
+        labels = _bucket_days(self.days, freq).astype("datetime64[D]")
+        labels[self.missing] = np.datetime64("NaT")
+        return pd.Series(labels.astype("datetime64[ns]"), name=self.name)
+
+    def counts(self, freq="W", start=None, end=None):
+        """Row counts per bucket, computed from the sorted day array"""
+        freq = BUCKETS.get(freq, freq)
+        lo = 0 if start is None else np.searchsorted(self.sorted_days, _day(start), side="left")
+        hi = len(self.sorted_days) if end is None else np.searchsorted(self.sorted_days, _day(end), side="right")
+        buckets = _bucket_days(self.sorted_days[lo:hi], freq)
+        if not len(buckets):
+            return pd.Series([], dtype=np.int64, name="count")
+        # Sorted input: bucket boundaries are where the value changes
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        sizes = np.diff(np.r_[starts, len(buckets)])
+        index = pd.DatetimeIndex(buckets[starts].astype("datetime64[D]").astype("datetime64[ns]"), name=self.name)
+        return pd.Series(sizes, index=index, name="count")
+
+
+def _day(value):
+    return np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64)
+
+
+def build_time_indexes(df):
+    """TimeIndex for every datetime column of ``df``"""
+    return {
+        col: TimeIndex(df[col])
+        for col in df.columns
+        if pd.api.types.is_datetime64_any_dtype(df[col])
+    }
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# Above this many points charts switch to WebGL traces
+WEBGL_THRESHOLD = 5_000
+# Default number of points actually sent to the browser
+MAX_LINE_POINTS = 5_000
+MAX_SCATTER_POINTS = 20_000
+
+
+def as_numbers(series):
+    """float64 positions for any plottable column: numbers, dates or category codes"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+        values[series.isna().to_numpy()] = np.nan
+        return values
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    codes, _ = pd.factorize(series, sort=True)
+    return np.where(codes >= 0, codes, np.nan).astype(np.float64)
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of ``threshold`` points that keep a line's shape.
+
+    ``x`` must be sorted. The first and last points are always kept; every
+    bucket in between contributes the point forming the largest triangle with
+    the previously kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start, next_stop = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[next_start:max(next_stop, next_start + 1)].mean()
+        next_y = y[next_start:max(next_stop, next_start + 1)].mean()
+        bx, by = x[start:stop], y[start:stop]
+        area = np.abs((x[previous] - next_x) * (by - y[previous]) - (x[previous] - bx) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def density_sample(coords, max_points, bins=200, random_state=0):
+    """Indices of at most ``max_points`` points that preserve the density picture.
+
+    Points are binned on a regular grid over ``coords`` (a list of float
+    arrays). Every cell keeps at most ``cap`` randomly chosen points, with the
+    largest ``cap`` that fits the budget, so sparse regions and outliers are
+    kept entirely and only crowded cells are thinned. When more cells are
+    occupied than ``max_points`` the grid is coarsened until they fit.
+    """
+    n = len(coords[0])
+    valid = np.ones(n, dtype=bool)
+    for values in coords:
+        valid &= ~np.isnan(values)
+    positions = np.flatnonzero(valid)
+    if len(positions) <= max_points:
+        return positions
+
+    scaled = []
+    for values in coords:
+        values = values[positions]
+        low, high = values.min(), values.max()
+        scaled.append((values - low) / (high - low) if high > low else np.zeros_like(values))
+    per_axis = max(2, round(bins ** (2 / len(coords))))
+    while True:
+        cells = np.zeros(len(positions), dtype=np.int64)
+        for values in scaled:
+            cells = cells * per_axis + np.minimum((values * per_axis).astype(np.int64), per_axis - 1)
+        # Every occupied cell keeps at least one point, so there must be no more cells than points
+        if per_axis == 1 or len(np.unique(cells)) <= max_points:
+            break
+        per_axis = max(1, min(per_axis - 1, int(per_axis * 0.8)))
+
+    # Random order within each cell, then keep the first ``cap`` of every cell
+    rng = np.random.default_rng(random_state)
+    order = np.lexsort((rng.random(len(cells)), cells))
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_cells)])
+    rank = np.arange(len(sorted_cells)) - np.repeat(starts, counts)
+
+    low, high = 1, int(counts.max())
+    while low < high:
+        cap = (low + high + 1) // 2
+        if np.minimum(counts, cap).sum() <= max_points:
+            low = cap
+        else:
+            high = cap - 1
+    selected = positions[order[rank < low]]
+    if len(selected) > max_points:
+        # Only when even one point per cell is too many (e.g. max_points=0); thin at random
+        selected = rng.choice(selected, size=max(max_points, 0), replace=False)
+    return np.sort(selected)
+
+
+def downsample_line(df, x, y, max_points=MAX_LINE_POINTS):
+    """Rows of ``df`` sorted by ``x`` and reduced with LTTB; returns ``(frame, original_points)``"""
+    data = df[[x, y]].dropna()
+    data = data.iloc[np.argsort(as_numbers(data[x]), kind="stable")]
+    if len(data) <= max_points:
+        return data, len(data)
+    keep = lttb(as_numbers(data[x]), as_numbers(data[y]), max_points)
+    return data.iloc[keep], len(data)
+
+
+def downsample_scatter(df, columns, max_points=MAX_SCATTER_POINTS):
+    """Rows of ``df`` thinned by density binning over ``columns``; returns ``(frame, original_points)``"""
+    coords = [as_numbers(df[col]) for col in columns]
+    keep = density_sample(coords, max_points)
+    original = int(np.logical_and.reduce([~np.isnan(values) for values in coords]).sum())
+    return df.iloc[keep], original
@@ -0,0 +1,314 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.model_selection import train_test_split
+from sklearn.utils import murmurhash3_32
+
+# Columns that identify a record rather than describe it
+IDENTIFIER_COLUMNS = ["Accession", "BioSample", "Isolate"]
+
+ONEHOT = "onehot"
+HASHING = "hashing"
+OTHER = "__other__"
+
+
+@dataclass(frozen=True)
+class EncodingConfig:
+    """How categorical columns become model features.
+
+    ``method`` is either sparse one-hot or feature hashing into ``hash_width``
+    columns. Categories seen fewer than ``min_frequency`` times share one
+    ``__other__`` bucket. Identifier-like columns (known IDs or more than
+    ``identifier_ratio`` distinct values per row) are dropped when
+    ``drop_identifiers`` is set.
+    """
+
+    method: str = ONEHOT
+    hash_width: int = 2 ** 12
+    min_frequency: int = 5
+    drop_identifiers: bool = True
+    identifier_ratio: float = 0.5
+
+
+def identifier_columns(df, ratio=0.5):
+    """Known ID columns plus text columns that are (almost) unique per row"""
+    found = [col for col in IDENTIFIER_COLUMNS if col in df.columns]
+    rows = max(len(df), 1)
+    for col in df.columns:
+        if col in found or pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        distinct = len(df[col].cat.categories) if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].nunique()
+        if distinct / rows > ratio:
+            found.append(col)
+    return found
+
+
+def _codes(series):
+    """Integer codes and labels for a text or categorical column (-1 = missing)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series)
+
+
+def bucket_rare(codes, labels, min_frequency):
+    """Fold categories seen fewer than ``min_frequency`` times into one OTHER code"""
+    if min_frequency <= 1 or not len(labels):
+        return codes, pd.Index(labels)
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    keep = counts >= min_frequency
+    if keep.all():
+        return codes, pd.Index(labels)
+    # Kept categories are renumbered densely; rare ones map to the last slot
+    remap = np.where(keep, np.cumsum(keep) - 1, keep.sum()).astype(np.int64)
+    new_codes = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+    new_labels = pd.Index(list(pd.Index(labels)[keep]) + [OTHER])
+    return new_codes, new_labels
+
+
+def _onehot_block(codes, width):
+    """CSR matrix with a single 1 per row at ``codes`` (no entry for missing)"""
+    rows = np.flatnonzero(codes >= 0)
+    data = np.ones(len(rows), dtype=np.float32)
+    return sparse.csr_matrix((data, (rows, codes[rows])), shape=(len(codes), width))
+
+
+def _hash_block(col, codes, labels, width):
+    """Signed feature hashing of ``col=value`` tokens, hashed once per category"""
+    hashes = np.array([murmurhash3_32(f"{col}={label}", seed=0) for label in labels], dtype=np.int64)
+    buckets = np.abs(hashes) % width
+    signs = np.where(hashes >= 0, 1.0, -1.0).astype(np.float32)
+    rows = np.flatnonzero(codes >= 0)
+    return sparse.csr_matrix(
+        (signs[codes[rows]], (rows, buckets[codes[rows]])), shape=(len(codes), width)
+    )
+
+
+def _numeric_values(series):
+    """Float64 values of a numeric or date column (dates as days since epoch)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        column = series.to_numpy(dtype="datetime64[D]").astype(np.float64)
+        column[series.isna().to_numpy()] = np.nan
+        return column
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _numeric_block(df, cols, fills=None):
+    """Dense numeric/date columns with missing values filled by the median.
+
+    Returns the CSR block and the fill value used per column; pass ``fills``
+    to reuse the training medians when encoding new data.
+    """
+    values = np.empty((len(df), len(cols)), dtype=np.float32)
+    used_fills = []
+    for i, col in enumerate(cols):
+        column = _numeric_values(df[col])
+        missing = np.isnan(column)
+        if fills is not None:
+            fill = fills[i]
+        else:
+            fill = float(np.nanmedian(column)) if not missing.all() else 0.0
+        if missing.any():
+            column = np.where(missing, fill, column)
+        values[:, i] = column
+        used_fills.append(fill)
+    return sparse.csr_matrix(values), used_fills
+
+
+def build_feature_matrix(df, target="Pangolin", config=None, exclude=("Accession",)):
+    """Encode ``df`` into a sparse CSR feature matrix for the classifier.
+
+    Returns ``(X, y, feature_names, report)`` where ``report`` holds the build
+    time, matrix memory, the memory a dense ``pd.get_dummies`` would need,
+    and the columns that were dropped. ``config`` defaults to :class:`EncodingConfig`.
+    """
+    config = config or EncodingConfig()
+    started = time.perf_counter()
+    candidates = [col for col in df.columns if col != target and col not in exclude]
+    frame = df[candidates]
+
+    dropped = {}
+    if config.drop_identifiers:
+        for col in identifier_columns(frame, config.identifier_ratio):
+            dropped[col] = "identifier"
+    for col in candidates:
+        if col not in dropped and frame[col].nunique(dropna=True) <= 1:
+            dropped[col] = "constant"
+    used = [col for col in candidates if col not in dropped]
+
+    numeric_cols = [
+        col for col in used
+        if pd.api.types.is_numeric_dtype(frame[col]) or pd.api.types.is_datetime64_any_dtype(frame[col])
+    ]
+    categorical_cols = [col for col in used if col not in numeric_cols]
+
+    blocks = []
+    feature_names = list(numeric_cols)
+    dense_columns = len(numeric_cols)
+    fills = []
+    if numeric_cols:
+        block, fills = _numeric_block(frame, numeric_cols)
+        blocks.append(block)
+
+    category_labels = {}
+    for col in categorical_cols:
+        codes, labels = _codes(frame[col])
+        dense_columns += len(labels)
+        codes, labels = bucket_rare(np.asarray(codes, dtype=np.int64), labels, config.min_frequency)
+        category_labels[col] = [str(label) for label in labels]
+        if config.method == HASHING:
+            blocks.append(_hash_block(col, codes, labels, config.hash_width))
+        else:
+            blocks.append(_onehot_block(codes, len(labels)))
+            feature_names.extend(f"{col}_{label}" for label in labels)
+
+    if config.method == HASHING and categorical_cols:
+        # All hashed columns share the same buckets, so sum them into one block
+        hashed = blocks[1 if numeric_cols else 0:]
+        blocks = blocks[:1 if numeric_cols else 0] + [sum(hashed[1:], hashed[0]).tocsr()]
+        feature_names.extend(f"hash_{i}" for i in range(config.hash_width))
+
+    if blocks:
+        X = sparse.hstack(blocks, format="csr", dtype=np.float32)
+    else:
+        X = sparse.csr_matrix((len(frame), 0), dtype=np.float32)
+    y = df[target]
+
+    # Everything needed to encode new rows into exactly the same columns
+    schema = {
+        "target": target,
+        "method": config.method,
+        "hash_width": config.hash_width,
+        "numeric": [{"name": col, "fill": fill} for col, fill in zip(numeric_cols, fills)],
+        "categorical": [{"name": col, "labels": category_labels[col]} for col in categorical_cols],
+        "feature_names": feature_names,
+    }
+    report = {
+        "seconds": time.perf_counter() - started,
+        "shape": X.shape,
+        "nbytes": X.data.nbytes + X.indices.nbytes + X.indptr.nbytes,
+        "dense_nbytes": len(frame) * dense_columns,  # get_dummies uses one byte per bool cell
+        "dropped": dropped,
+        "schema": schema,
+    }
+    return X, y, feature_names, report
+
+
+def encode_with_schema(df, schema):
+    """Encode new rows into exactly the columns described by a training ``schema``.
+
+    Numeric columns reuse the training fill values; categories not seen during
+    training fall into the ``__other__`` bucket when training had one and are
+    left empty otherwise. Columns absent from ``df`` are treated as missing.
+    """
+    blocks = []
+    numeric = schema["numeric"]
+    if numeric:
+        names = [item["name"] for item in numeric]
+        frame = pd.DataFrame({
+            col: df[col] if col in df.columns else pd.Series(np.nan, index=df.index) for col in names
+        })
+        block, _ = _numeric_block(frame, names, fills=[item["fill"] for item in numeric])
+        blocks.append(block)
+
+    hashed = []
+    for item in schema["categorical"]:
+        col, labels = item["name"], pd.Index(item["labels"])
+        if col in df.columns:
+            present = df[col].notna().to_numpy()
+            codes = labels.get_indexer(df[col].astype(str)).astype(np.int64)
+            if OTHER in labels:
+                codes[(codes < 0) & present] = labels.get_loc(OTHER)
+            codes[~present] = -1
+        else:
+            codes = np.full(len(df), -1, dtype=np.int64)
+        if schema["method"] == HASHING:
+            hashed.append(_hash_block(col, codes, labels, schema["hash_width"]))
+        else:
+            blocks.append(_onehot_block(codes, len(labels)))
+    if hashed:
+        blocks.append(sum(hashed[1:], hashed[0]).tocsr())
+
+    if not blocks:
+        return sparse.csr_matrix((len(df), 0), dtype=np.float32)
+    return sparse.hstack(blocks, format="csr", dtype=np.float32)
+
+
+@dataclass(frozen=True)
+class FeatureSet:
+    """Encoded features plus the train/test split built alongside them"""
+
+    X: object
+    y: pd.Series
+    feature_names: list
+    report: dict
+    config: EncodingConfig
+    train_idx: np.ndarray
+    test_idx: np.ndarray
+    rows: np.ndarray = None  # positions of the encoded rows in the input frame (None = all rows)
+
+    @property
+    def schema(self):
+        return self.report["schema"]
+
+    @property
+    def X_train(self):
+        return self.X[self.train_idx]
+
+    @property
+    def X_test(self):
+        return self.X[self.test_idx]
+
+    @property
+    def y_train(self):
+        return self.y.iloc[self.train_idx]
+
+    @property
+    def y_test(self):
+        return self.y.iloc[self.test_idx]
+
+
+def split_indices(y, test_size=0.2, random_state=42):
+    """Stratified train/test row positions that tolerate single-member classes.
+
+    Classes with fewer than two rows cannot be stratified, so they always go
+    to the training side; if stratification is still impossible (for example
+    more classes than test rows) the split falls back to a plain shuffle.
+    Fewer than two rows cannot be split at all: they all go to training and
+    the test side is empty, leaving the caller's size check to reject them.
+    """
+    positions = np.arange(len(y))
+    if len(positions) < 2:
+        return positions, positions[:0]
+    codes, _ = pd.factorize(y)
+    counts = np.bincount(codes[codes >= 0], minlength=1)
+    singletons = (codes < 0) | (counts[np.maximum(codes, 0)] < 2)
+    common = positions[~singletons]
+    try:
+        train, test = train_test_split(
+            common, test_size=test_size, random_state=random_state, stratify=codes[common]
+        )
+    except ValueError:
+        train, test = train_test_split(positions, test_size=test_size, random_state=random_state)
+        return np.sort(train), np.sort(test)
+    return np.sort(np.concatenate([train, positions[singletons]])), np.sort(test)
+
+
+def prepare_features(df, target="Pangolin", config=None, test_size=0.2, random_state=42):
+    """Build the feature matrix and its stratified split in one step.
+
+    Rows without a target value cannot be learned from and are left out;
+    ``report["missing_target"]`` counts them and ``rows`` locates the rest.
+    """
+    config = config or EncodingConfig()
+    rows = None
+    missing = df[target].isna().to_numpy()
+    if missing.any():
+        rows = np.flatnonzero(~missing)
+        df = df.iloc[rows]
+    X, y, feature_names, report = build_feature_matrix(df, target=target, config=config)
+    report["missing_target"] = int(missing.sum())
+    train_idx, test_idx = split_indices(y, test_size=test_size, random_state=random_state)
+    return FeatureSet(X, y, feature_names, report, config, train_idx, test_idx, rows)
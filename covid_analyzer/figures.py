@@ -0,0 +1,88 @@
+"""Memory-bounded LRU cache of built Plotly figures.
+
+Streamlit reruns the whole script on every interaction, so without a cache
+every chart is rebuilt (aggregation, downsampling, Plotly validation) even when
+only an unrelated control changed. Figures are kept as objects, so a hit
+costs nothing beyond the lookup; each one is sized by its Plotly JSON (the
+payload the browser receives) once, when it is stored. ``st.plotly_chart``
+copies a figure with ``to_dict`` before sending it, but other callers must
+not modify a figure they got from the cache.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+from .cache import cache_key
+
+DEFAULT_MAX_BYTES = int(os.environ.get("COVID_ANALYZER_FIGURE_CACHE_MB", "256")) * 1024 * 1024
+
+
+def figure_key(source, chart, **params):
+    """Cache key of a chart: the data it is drawn from, its type and every control that changes it"""
+    return cache_key(source, chart=chart, **params)
+
+
+class FigureCache:
+    """Figures (plus an optional caption) evicted least-recently-used first.
+
+    One instance is shared by all sessions of the app, hence the lock.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """``(figure, note)`` for ``key``, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        figure, note, _ = entry
+        return figure, note
+
+    def put(self, key, figure, note=None):
+        size = len(pio.to_json(figure, validate=False))
+        if size > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[2]
+            self._entries[key] = (figure, note, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted
+
+    def get_or_build(self, key, build):
+        """Cached ``(figure, note)`` for ``key``; on a miss ``build()`` makes one and it is stored.
+
+        ``build`` returns ``(figure, note)``; a None figure (nothing to draw)
+        is passed through without being cached.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        figure, note = build()
+        if figure is not None:
+            self.put(key, figure, note)
+        return figure, note
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
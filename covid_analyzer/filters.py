@@ -0,0 +1,164 @@
+"""Row filters as boolean masks over a loaded frame.
+
+Filters never copy or modify the frame they describe: they produce a mask of
+the rows to keep, masks from several filters are combined with ``&``, and the
+caller materializes the selected rows once (or not at all when every row is
+kept).
+"""
+
+import numpy as np
+import pandas as pd
+
+from .dates import TimeIndex
+
+DROP, KEEP = "drop", "keep"
+# Columns the filter panel indexes when they are present
+FILTER_COLUMNS = ["Country", "Pangolin", "Host", "Nuc_Completeness", "Organization"]
+DATE_COLUMN = "Collection_Date"
+
+
+class NullBitmaps:
+    """Missing-value bitmap of every column, packed eight rows per byte.
+
+    Built with one ``isna`` pass per column; afterwards missing counts and
+    row masks for any set of columns are bit operations on these arrays.
+    Columns without missing values store no bitmap at all.
+    """
+
+    def __init__(self, df):
+        self.length = len(df)
+        self.columns = list(df.columns)
+        self.dtypes = {col: str(dtype) for col, dtype in df.dtypes.items()}
+        self.counts = {}
+        self._bitmaps = {}
+        for col in self.columns:
+            missing = df[col].isna().to_numpy()
+            self.counts[col] = int(missing.sum())
+            if self.counts[col]:
+                self._bitmaps[col] = np.packbits(missing)
+
+    def null_mask(self, column):
+        """Boolean mask of the rows where ``column`` is missing"""
+        if column not in self._bitmaps:
+            return np.zeros(self.length, dtype=bool)
+        return np.unpackbits(self._bitmaps[column], count=self.length).view(bool)
+
+    def any_missing(self, columns=None):
+        """Boolean mask of the rows missing a value in any of ``columns`` (default: all)"""
+        packed = None
+        for col in self.columns if not columns else columns:
+            if col in self._bitmaps:
+                packed = self._bitmaps[col].copy() if packed is None else packed | self._bitmaps[col]
+        if packed is None:
+            return np.zeros(self.length, dtype=bool)
+        return np.unpackbits(packed, count=self.length).view(bool)
+
+    def missing_mask(self, mode=DROP, columns=None):
+        """Rows to keep: without missing values in ``columns`` (``drop``) or only those with some (``keep``)"""
+        missing = self.any_missing(columns)
+        return ~missing if mode == DROP else missing
+
+    def summary(self):
+        """Missing-value count and dtype per column, like :func:`~covid_analyzer.analysis.missing_summary`"""
+        return pd.DataFrame({
+            "column": self.columns,
+            "missing": [self.counts[col] for col in self.columns],
+            "dtype": [self.dtypes[col] for col in self.columns],
+        })
+
+    @property
+    def nbytes(self):
+        return sum(bitmap.nbytes for bitmap in self._bitmaps.values())
+
+
+class ValueIndex:
+    """Rows of every value of one column, for fast ``column in values`` filters.
+
+    Frequent values (at least ``1 / dense_ratio`` of the rows) keep a packed
+    bitmap of n/8 bytes; rare ones keep their sorted row positions, so the
+    index stays within a few bytes per row however many values there are.
+    """
+
+    def __init__(self, series, dense_ratio=32):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, labels = series.cat.codes.to_numpy().astype(np.int64), series.cat.categories
+        else:
+            codes, labels = pd.factorize(series, sort=True)
+        self.length = len(series)
+        counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        observed = np.flatnonzero(counts)
+        self.labels = [str(label) for label in np.asarray(labels, dtype=object)[observed]]
+        self.counts = dict(zip(self.labels, counts[observed].tolist()))
+
+        order = np.argsort(codes, kind="stable").astype(np.int32 if self.length < 2 ** 31 else np.int64)
+        starts = np.concatenate([[0], np.cumsum(np.bincount(codes + 1, minlength=len(labels) + 1))])
+        self._bitmaps, self._positions = {}, {}
+        for label, code in zip(self.labels, observed):
+            # codes + 1 above moves missing (-1) to slot 0
+            positions = order[starts[code + 1]:starts[code + 2]]
+            if len(positions) * dense_ratio >= self.length:
+                mask = np.zeros(self.length, dtype=bool)
+                mask[positions] = True
+                self._bitmaps[label] = np.packbits(mask)
+            else:
+                self._positions[label] = positions
+
+    def mask(self, values):
+        """Boolean mask of the rows holding any of ``values`` (an OR over their bitmaps)"""
+        packed = None
+        for value in values:
+            if value in self._bitmaps:
+                packed = self._bitmaps[value].copy() if packed is None else packed | self._bitmaps[value]
+        mask = np.zeros(self.length, dtype=bool) if packed is None else np.unpackbits(packed, count=self.length).view(bool)
+        for value in values:
+            if value in self._positions:
+                mask[self._positions[value]] = True
+        return mask
+
+    @property
+    def nbytes(self):
+        return (sum(bitmap.nbytes for bitmap in self._bitmaps.values())
+                + sum(positions.nbytes for positions in self._positions.values()))
+
+
+class FilterIndex:
+    """Value indexes of the filter columns plus a sorted date index, built once per dataset.
+
+    :meth:`mask` ANDs the selected columns (each an OR of its chosen values)
+    and the date range; it only touches the indexes, never the frame.
+    """
+
+    def __init__(self, df, columns=FILTER_COLUMNS, date_column=DATE_COLUMN):
+        self.length = len(df)
+        self.columns = {col: ValueIndex(df[col]) for col in columns if col in df.columns}
+        self.dates = None
+        if date_column in df.columns and pd.api.types.is_datetime64_any_dtype(df[date_column]):
+            self.dates = TimeIndex(df[date_column])
+
+    def options(self, column):
+        """Values of ``column``, most frequent first"""
+        index = self.columns[column]
+        return sorted(index.labels, key=lambda label: -index.counts[label])
+
+    def mask(self, selections=None, date_range=None):
+        """Rows matching every non-empty selection ({column: values}) and the date range, or None if unfiltered"""
+        mask = None
+        for col, values in (selections or {}).items():
+            if values and col in self.columns:
+                col_mask = self.columns[col].mask(values)
+                mask = col_mask if mask is None else mask & col_mask
+        if date_range is not None and self.dates is not None:
+            date_mask = self.dates.mask(*date_range)
+            mask = date_mask if mask is None else mask & date_mask
+        return mask
+
+    @property
+    def nbytes(self):
+        return sum(index.nbytes for index in self.columns.values())
+
+
+def select_rows(df, mask):
+    """Rows of ``df`` where ``mask`` is set; ``df`` itself when every row is kept"""
+    if mask is None or mask.all():
+        return df
+    return df.iloc[np.flatnonzero(mask)]
@@ -0,0 +1,239 @@
+"""Group-by engine over integer codes with memoized groupings and aggregations.
+
+Grouping columns are reduced to integer codes (categorical codes are used as
+they are, anything else is factorized once) and combined into one group id
+per row. Only groups that actually occur are kept, so grouping by several
+high-cardinality categoricals never materialises their cartesian product.
+Group ids, the per-group sorted values and every aggregated column are cached,
+so asking for another aggregation of the same grouping reuses the work.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .dates import BUCKETS, build_time_indexes
+
+AGGREGATIONS = ["sum", "mean", "median", "min", "max", "count", "nunique"]
+# Aggregations that make sense for text, categorical and date columns
+COUNTING = ["count", "nunique"]
+# Needs the values sorted within each group
+_ORDERED = {"median", "min", "max", "nunique"}
+_MAX_CODE = 2 ** 62
+
+
+def key_codes(series):
+    """Integer codes (-1 = missing) and labels of a grouping column"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64), series.cat.categories
+    codes, labels = pd.factorize(series, sort=True)
+    return codes.astype(np.int64), labels
+
+
+def is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def aggregations_for(series):
+    """Aggregations available for a value column"""
+    return AGGREGATIONS if is_numeric(series) else COUNTING
+
+
+class Grouping:
+    """Group id of every selected row plus the labels of the observed groups"""
+
+    def __init__(self, rows, ids, labels):
+        self.rows = rows  # positions in the frame (None = all rows)
+        self.ids = ids  # group id per selected row, -1 where a key is missing
+        self.labels = labels  # DataFrame with one row per group, in key order
+
+    def __len__(self):
+        return len(self.labels)
+
+    def sizes(self):
+        valid = self.ids >= 0
+        return np.bincount(self.ids[valid], minlength=len(self))
+
+
+class GroupByEngine:
+    """Memoized group-by aggregations over one frame.
+
+    ``aggregate`` returns one column per requested aggregation; all of them
+    share the grouping and (for median, min, max and nunique) a single sort of
+    the values by group, and every result column is cached on its own.
+    One engine is shared by all sessions of the app, hence the lock.
+    """
+
+    def __init__(self, df, time_indexes=None, max_cached=32):
+        self.df = df
+        time_indexes = time_indexes or {}
+        if any(index.length != len(df) for index in time_indexes.values()):
+            # Indexes built before rows were dropped no longer line up with df
+            time_indexes = build_time_indexes(df)
+        self.time_indexes = time_indexes
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key, compute):
+        with self._lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+                return value
+        # Computed outside the lock: compute() may itself look up cached groupings
+        value = compute()
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return value
+
+    def _key(self, keys, bucket, date_range):
+        """Normalized ``(keys, bucket, date_range)``: bucket and range only matter for date keys"""
+        keys = tuple(keys)
+        if not any(col in self.time_indexes for col in keys):
+            return keys, None, None
+        if date_range is not None and len(date_range) != 2:
+            date_range = None
+        return keys, bucket, None if date_range is None else tuple(date_range)
+
+    def grouping(self, keys, bucket="Month", date_range=None):
+        """Cached :class:`Grouping` of ``keys``; date keys are truncated to ``bucket``.
+
+        With a ``(start, end)`` ``date_range`` only rows in that range of the
+        first date key are grouped, found through its sorted index.
+        """
+        key = self._key(keys, bucket, date_range)
+        return self._cached(("grouping",) + key, lambda: self._group(*key))
+
+    def _group(self, keys, bucket, date_range):
+        date_keys = [col for col in keys if col in self.time_indexes]
+        rows = None
+        if date_range is not None:
+            rows = np.sort(self.time_indexes[date_keys[0]].positions(*date_range))
+
+        ids = np.zeros(len(self.df) if rows is None else len(rows), dtype=np.int64)
+        valid = np.ones(len(ids), dtype=bool)
+        levels, size = [], 1
+        for col in keys:
+            key = self.time_indexes[col].bucket(BUCKETS.get(bucket, bucket)) if col in date_keys else self.df[col]
+            if rows is not None:
+                key = key.iloc[rows]
+            codes, labels = key_codes(key)
+            levels.append((codes, labels))
+            valid &= codes >= 0
+            if size * max(len(labels), 1) >= _MAX_CODE:
+                # Re-number the observed combinations so the ids cannot overflow
+                _, ids = np.unique(ids, return_inverse=True)
+                size = int(ids.max()) + 1 if len(ids) else 1
+            ids = ids * max(len(labels), 1) + np.maximum(codes, 0)
+            size *= max(len(labels), 1)
+
+        # Observed groups only, numbered in key order
+        positions = np.flatnonzero(valid)
+        group_ids = np.full(len(ids), -1, dtype=np.int64)
+        if size <= 4 * len(ids) + 1024:
+            # Few possible combinations: count them instead of sorting the ids
+            observed = np.flatnonzero(np.bincount(ids[positions], minlength=size))
+            remap = np.full(size, -1, dtype=np.int64)
+            remap[observed] = np.arange(len(observed))
+            group_ids[positions] = remap[ids[positions]]
+            first = np.empty(size, dtype=np.int64)
+            first[ids[positions[::-1]]] = positions[::-1]
+            first_rows = first[observed]
+        else:
+            _, first, inverse = np.unique(ids[positions], return_index=True, return_inverse=True)
+            group_ids[positions] = inverse
+            first_rows = positions[first]
+        labels = pd.DataFrame({
+            col: labels.take(codes[first_rows]) if len(labels) else np.array([], dtype=object)
+            for col, (codes, labels) in zip(keys, levels)
+        })
+        return Grouping(rows, group_ids, labels)
+
+    def _values(self, grouping, column):
+        """Group ids and values of the rows with both a group and a value"""
+        series = self.df[column]
+        if grouping.rows is not None:
+            series = series.iloc[grouping.rows]
+        if is_numeric(series):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+        else:
+            codes, _ = key_codes(series)
+            values = codes.astype(np.float64)
+            present = codes >= 0
+        present &= grouping.ids >= 0
+        return grouping.ids[present], values[present]
+
+    def _sorted(self, key, grouping, column):
+        """Values sorted by (group, value) and the start of every group in that order"""
+        def compute():
+            ids, values = self._values(grouping, column)
+            # Sort the values, then stably by group; small group ids get NumPy's radix sort
+            order = np.argsort(values)
+            group_order = ids[order].astype(np.uint16) if len(grouping) <= np.iinfo(np.uint16).max else ids[order]
+            order = order[np.argsort(group_order, kind="stable")]
+            ids, values = ids[order], values[order]
+            starts = np.searchsorted(ids, np.arange(len(grouping) + 1))
+            return ids, values, starts
+        return self._cached(("sorted",) + key + (column,), compute)
+
+    def _stat(self, key, grouping, column, agg):
+        def compute():
+            if agg in _ORDERED:
+                ids, values, starts = self._sorted(key, grouping, column)
+                counts = np.diff(starts)
+                has = counts > 0
+                result = np.full(len(grouping), np.nan)
+                if agg == "nunique":
+                    change = np.ones(len(ids), dtype=bool)
+                    change[1:] = (ids[1:] != ids[:-1]) | (values[1:] != values[:-1])
+                    return np.bincount(ids[change], minlength=len(grouping))
+                if agg == "min":
+                    result[has] = values[starts[:-1][has]]
+                elif agg == "max":
+                    result[has] = values[starts[1:][has] - 1]
+                else:
+                    low = starts[:-1][has] + (counts[has] - 1) // 2
+                    high = starts[:-1][has] + counts[has] // 2
+                    result[has] = (values[low] + values[high]) / 2
+                return result
+            ids, values = self._values(grouping, column)
+            counts = np.bincount(ids, minlength=len(grouping))
+            if agg == "count":
+                return counts
+            sums = np.bincount(ids, weights=values, minlength=len(grouping))
+            if agg == "sum":
+                return sums
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return sums / counts
+        return self._cached(("stat",) + key + (column, agg), compute)
+
+    def aggregate(self, keys, column=None, aggregations=("count",), bucket="Month", date_range=None):
+        """One row per observed group of ``keys`` with the requested aggregations of ``column``.
+
+        Without ``column`` the single value column ``count`` holds the rows per
+        group. Otherwise there is one ``<column>_<aggregation>`` column per
+        aggregation; text, categorical and date columns support ``count`` and
+        ``nunique`` only.
+        """
+        key = self._key(keys, bucket, date_range)
+        grouping = self.grouping(*key)
+        result = grouping.labels.copy()
+        if column is None:
+            result["count"] = self._cached(("size",) + key, grouping.sizes)
+            return result
+
+        allowed = aggregations_for(self.df[column])
+        for agg in aggregations:
+            if agg not in allowed:
+                raise ValueError(f"Cannot compute {agg} of non-numeric column {column!r}")
+            values = self._stat(key, grouping, column, agg)
+            if agg == "sum" and pd.api.types.is_integer_dtype(self.df[column]):
+                values = values.astype(np.int64)
+            result[f"{column}_{agg}"] = values
+        return result
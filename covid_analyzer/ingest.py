@@ -0,0 +1,175 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import (
+    CATEGORICAL,
+    DATE,
+    NULL_TOKENS,
+    NUMERIC,
+    clean_dataframe,
+    convert_column,
+    convert_date_column,
+    infer_schema,
+    unparsed_dates,
+    warn_unparsed,
+)
+from .dates import precision_column
+from .schema import NCBI_SCHEMA
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def csv_dtypes(schema):
+    """read_csv dtypes that keep every non-numeric column as text"""
+    return {col: str for col, kind in schema.items() if kind != NUMERIC}
+
+
+class _ColumnBuffer:
+    """Accumulates one converted column chunk by chunk in a compact form.
+
+    Categorical columns are stored as int32 codes against a growing global
+    dictionary, so only the distinct values are ever held as Python objects.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.parts = []
+        self.categories = {}
+
+    def append(self, values):
+        if self.kind == CATEGORICAL:
+            lookup = np.array(
+                [self.categories.setdefault(value, len(self.categories)) for value in values.cat.categories] + [-1],
+                dtype=np.int32,
+            )
+            # Missing values have code -1, which picks the trailing -1 above
+            self.parts.append(lookup[values.cat.codes.to_numpy()])
+        elif self.kind in (NUMERIC, DATE):
+            self.parts.append(values.to_numpy())
+        else:
+            self.parts.append(values.array)
+
+    def finish(self):
+        if self.kind == CATEGORICAL:
+            codes = np.concatenate(self.parts) if self.parts else np.array([], dtype=np.int32)
+            return pd.Categorical.from_codes(codes, categories=list(self.categories))
+        if self.kind in (NUMERIC, DATE):
+            return np.concatenate(self.parts) if self.parts else np.array([])
+        if not self.parts:
+            return pd.array([], dtype="string")
+        return pd.concat([pd.Series(part) for part in self.parts], ignore_index=True).array
+
+
+def _source_size(source):
+    """Total byte size of a path or file-like object, or None when unknown"""
+    size = getattr(source, "size", None)
+    if size is not None:
+        return size
+    try:
+        position = source.tell()
+        size = source.seek(0, 2)
+        source.seek(position)
+        return size
+    except (AttributeError, OSError):
+        pass
+    try:
+        return os.path.getsize(source)
+    except (TypeError, OSError):
+        return None
+
+
+def iter_clean_chunks(source, chunksize=DEFAULT_CHUNKSIZE, schema=NCBI_SCHEMA, nrows=None, usecols=None):
+    """Yield ``(chunk, kinds)`` with every chunk already type-converted.
+
+    Columns missing from ``schema`` are classified from the first chunk and
+    keep that kind for the rest of the file. ``usecols`` limits the columns read.
+    """
+    reader = pd.read_csv(
+        source,
+        chunksize=chunksize,
+        nrows=nrows,
+        usecols=usecols,
+        dtype=csv_dtypes(schema),
+        na_values=NULL_TOKENS,
+    )
+    kinds = None
+    unparsed = {}
+    with reader:
+        for chunk in reader:
+            if kinds is None:
+                kinds = {}
+                for col, kind in infer_schema(chunk, known=schema).items():
+                    kinds[col] = kind
+                    if kind == DATE and precision_column(col) and precision_column(col) not in chunk.columns:
+                        kinds[precision_column(col)] = CATEGORICAL
+            for col in list(chunk.columns):
+                if kinds[col] != DATE:
+                    chunk[col] = convert_column(chunk[col], kinds[col])
+                    continue
+                original = chunk[col]
+                chunk[col], precision = convert_date_column(original)
+                unparsed[col] = unparsed.get(col, 0) + unparsed_dates(original, chunk[col])
+                if precision is not None and precision_column(col) not in chunk.columns:
+                    chunk.insert(chunk.columns.get_loc(col) + 1, precision_column(col), precision)
+            yield chunk, kinds
+    # One warning per column for the whole file rather than one per chunk
+    for col, count in unparsed.items():
+        warn_unparsed(col, count)
+
+
+def read_csv_streaming(source, chunksize=DEFAULT_CHUNKSIZE, schema=NCBI_SCHEMA, nrows=None, progress=None):
+    """Read a CSV in fixed-size chunks into compact column buffers.
+
+    Each chunk is cleaned as it is read and then dropped, so peak memory stays
+    close to the size of the final frame instead of raw + cleaned copies.
+    ``progress`` is called as ``progress(fraction, rows_read)`` after every chunk;
+    ``fraction`` is None when the input size is unknown.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        # Open paths ourselves so the read position can drive the progress bar
+        with open(source, "rb") as handle:
+            return read_csv_streaming(handle, chunksize, schema, nrows, progress)
+
+    total_bytes = _source_size(source)
+    buffers = None
+    rows = 0
+    for chunk, kinds in iter_clean_chunks(source, chunksize=chunksize, schema=schema, nrows=nrows):
+        if buffers is None:
+            buffers = {col: _ColumnBuffer(kind) for col, kind in kinds.items()}
+        for col, buffer in buffers.items():
+            buffer.append(chunk[col])
+        rows += len(chunk)
+        del chunk
+
+        if progress is not None:
+            if nrows:
+                fraction = rows / nrows
+            elif total_bytes and hasattr(source, "tell"):
+                fraction = source.tell() / total_bytes
+            else:
+                fraction = None
+            progress(min(fraction, 1.0) if fraction is not None else None, rows)
+
+    if buffers is None:
+        return pd.DataFrame()
+    return pd.DataFrame({col: buffer.finish() for col, buffer in buffers.items()})
+
+
+def load_dataset(source, name=None, streaming=False, chunksize=DEFAULT_CHUNKSIZE, nrows=None, parallel=False,
+                 schema=NCBI_SCHEMA, progress=None):
+    """Read and clean a CSV or Excel file (path or file-like) the way the app does.
+
+    ``name`` decides the format and defaults to the path or the file's
+    ``name`` attribute. With ``streaming`` a CSV goes through
+    :func:`read_csv_streaming`; otherwise it is read whole and cleaned once.
+    """
+    name = str(name or getattr(source, "name", source))
+    if name.endswith("csv") and streaming:
+        return read_csv_streaming(source, chunksize=chunksize, schema=schema, nrows=nrows, progress=progress)
+    if name.endswith("csv"):
+        df = pd.read_csv(source, dtype=csv_dtypes(schema), nrows=nrows)
+    else:
+        df = pd.read_excel(source, dtype=csv_dtypes(schema), nrows=nrows)
+    return clean_dataframe(df, parallel=parallel, known=schema)
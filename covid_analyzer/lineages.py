@@ -0,0 +1,168 @@
+"""Pango lineage hierarchy: alias expansion, ancestry and roll-up to a depth.
+
+Pango names are paths: ``B.1.1.7`` is a child of ``B.1.1``, and once a path
+gets deep its prefix is replaced by a short alias (``BA.2`` is
+``B.1.1.529.2``, ``KP.3`` is ``JN.1.11.1.3``). :class:`LineageTrie` expands
+the distinct labels of a column once and keeps the tree of all their
+ancestors with per-node row counts, so lineage counts at any depth come from
+the tree and rolling a column up only relabels its categories.
+
+Depth counts the components of the full path: ``B`` is depth 1,
+``B.1.1.529`` (Omicron) depth 4 and ``BA.2`` depth 5. Recombinants (``X...``)
+and labels that are not lineage names (``unclassifiable``) are roots.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ALIAS_PATH = os.environ.get("COVID_ANALYZER_PANGO_ALIASES") or None
+# Full paths of the aliases common in NCBI metadata, from the pango-designation
+# alias key; point COVID_ANALYZER_PANGO_ALIASES at alias_key.json for all of them
+ALIASES = {
+    "C": "B.1.1.1",
+    "D": "B.1.1.25",
+    "P": "B.1.1.28",
+    "Q": "B.1.1.7",
+    "AY": "B.1.617.2",
+    "BA": "B.1.1.529",
+    "BD": "B.1.1.529.1.17.2",
+    "BE": "B.1.1.529.5.3.1",
+    "BF": "B.1.1.529.5.2.1",
+    "BG": "B.1.1.529.2.12.1",
+    "BM": "B.1.1.529.2.75.3",
+    "BN": "B.1.1.529.2.75.5",
+    "BQ": "B.1.1.529.5.3.1.1.1.1",
+    "CH": "B.1.1.529.2.75.3.4.1.1",
+    "JN": "B.1.1.529.2.86.1",
+    "KP": "B.1.1.529.2.86.1.1.11.1",
+    "LP": "B.1.1.529.2.86.1.1.11.1.1.1",
+    "MC": "B.1.1.529.2.86.1.1.11.1.3.1.1",
+    "EG": "XBB.1.9.2",
+    "FL": "XBB.1.9.1",
+    "FU": "XBB.1.16.1",
+    "GK": "XBB.1.5.70",
+    "HK": "XBB.1.9.2.5.1.1",
+    "HV": "XBB.1.9.2.5.1.6",
+}
+_NAME = re.compile(r"^[A-Z]+(\.\d+)*$")
+
+
+def load_aliases(path=DEFAULT_ALIAS_PATH):
+    """The built-in aliases, extended by a pango-designation ``alias_key.json`` at ``path``"""
+    aliases = dict(ALIASES)
+    if path:
+        with open(path) as handle:
+            for alias, full in json.load(handle).items():
+                # Recombinants map to their list of parents and stay roots
+                if isinstance(full, str) and full:
+                    aliases[alias] = full
+    return aliases
+
+
+def expand(label, aliases=ALIASES):
+    """Full path of a Pango label (``BA.2.75`` -> ``B.1.1.529.2.75``); other labels are returned as they are"""
+    if not _NAME.match(label):
+        return label
+    head, _, rest = label.partition(".")
+    seen = set()
+    while head in aliases and head not in seen:
+        seen.add(head)
+        label = aliases[head] + ("." + rest if rest else "")
+        head, _, rest = label.partition(".")
+    return label
+
+
+class LineageTrie:
+    """Every lineage of a column and all its ancestors, with precomputed row counts.
+
+    Nodes are full paths as tuples. ``counts`` holds the rows labelled with
+    a node itself and ``totals`` the rows of its whole subtree; both are
+    filled from one ``value_counts`` of the column, so building the trie
+    costs one pass over the rows and everything else works on the labels.
+    """
+
+    def __init__(self, series, aliases=None):
+        self.aliases = load_aliases() if aliases is None else aliases
+        self._short = {}
+        for alias, full in self.aliases.items():
+            self._short.setdefault(full, alias)
+        self.paths = {}
+        self.counts, self.totals = {}, {}
+        observed = series.value_counts(dropna=True)
+        for label, count in zip(observed.index, observed.to_numpy().tolist()):
+            if not count:
+                continue
+            label = str(label)
+            path = self.path(label)
+            self.paths[label] = path
+            self.counts[path] = self.counts.get(path, 0) + count
+            for depth in range(1, len(path) + 1):
+                self.totals[path[:depth]] = self.totals.get(path[:depth], 0) + count
+        self.max_depth = max((len(path) for path in self.paths.values()), default=0)
+        self._rollups = {}
+
+    def path(self, label):
+        """Full path of ``label`` as a tuple of components"""
+        if label in self.paths:
+            return self.paths[label]
+        return tuple(expand(label, self.aliases).split(".")) if _NAME.match(label) else (label,)
+
+    def name(self, path):
+        """Pango name of a path: its longest aliased prefix is replaced by the alias"""
+        for end in range(len(path) - 1, 0, -1):
+            alias = self._short.get(".".join(path[:end]))
+            if alias:
+                return ".".join((alias,) + path[end:])
+        return ".".join(path)
+
+    def ancestry(self, label):
+        """Names of ``label`` and its ancestors, root first"""
+        path = self.path(label)
+        return [self.name(path[:depth]) for depth in range(1, len(path) + 1)]
+
+    def ancestor(self, label, depth):
+        """The ancestor of ``label`` at ``depth``, or the label itself if it is not that deep"""
+        return self.name(self.path(label)[:depth])
+
+    def rollup(self, series, depth):
+        """``series`` with every lineage replaced by its ancestor at ``depth``, as a categorical.
+
+        Only the distinct labels are mapped; the rows just get new codes.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, labels = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, labels = pd.factorize(series)
+        # A trailing "" sorts first, so missing values (code -1 picks the last entry) end up at -1 again
+        parents = np.asarray([self.ancestor(str(label), depth) for label in labels] + [""], dtype=object)
+        rolled, inverse = np.unique(parents, return_inverse=True)
+        return pd.Series(pd.Categorical.from_codes(inverse[codes] - 1, categories=rolled[1:]), index=series.index,
+                         name=series.name)
+
+    def counts_at(self, depth):
+        """Rows per lineage after rolling up to ``depth``, largest first (read from the tree, not the rows)"""
+        if depth not in self._rollups:
+            counts = {self.name(node): total for node, total in self.totals.items() if len(node) == depth}
+            for node, count in self.counts.items():
+                if len(node) < depth:
+                    counts[self.name(node)] = count
+            self._rollups[depth] = pd.Series(counts, dtype=np.int64, name="count").rename_axis("lineage")
+            self._rollups[depth] = self._rollups[depth].sort_values(ascending=False, kind="stable")
+        return self._rollups[depth]
+
+    def lineages(self, depth):
+        """Number of distinct lineages after rolling up to ``depth``"""
+        return len(self.counts_at(depth))
+
+    def tree(self, depth):
+        """Nodes down to ``depth`` with their parent and subtree rows, ready for a sunburst"""
+        nodes = sorted((node for node in self.totals if len(node) <= depth), key=lambda node: (len(node), node))
+        return pd.DataFrame({
+            "lineage": [self.name(node) for node in nodes],
+            "parent": [self.name(node[:-1]) if len(node) > 1 else "" for node in nodes],
+            "count": [self.totals[node] for node in nodes],
+        })
@@ -0,0 +1,111 @@
+import json
+import os
+import resource
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Append one JSON line per stage to this file when set
+DEFAULT_LOG_PATH = os.environ.get("COVID_ANALYZER_PROFILE_LOG") or None
+
+
+def rss_bytes():
+    """Current resident set size; falls back to the lifetime peak where /proc is missing"""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def payload_size(obj):
+    """Approximate bytes a result occupies (or sends to the browser), or None if unknown"""
+    if obj is None:
+        return None
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(index=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if sparse.issparse(obj):
+        if not hasattr(obj, "indptr"):
+            obj = obj.tocsr()
+        return int(obj.data.nbytes + obj.indices.nbytes + obj.indptr.nbytes)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, str)):
+        return len(obj)
+    if hasattr(obj, "to_plotly_json"):
+        # Plotly figure: the data arrays dominate what is shipped to the browser
+        total = 0
+        for trace in obj.data:
+            for key in ("x", "y", "z", "values", "labels", "ids", "parents", "text"):
+                values = getattr(trace, key, None)
+                if values is not None and not isinstance(values, str):
+                    array = np.asarray(values)
+                    total += array.nbytes if array.dtype != object else sum(len(str(v)) for v in array.ravel())
+        return total
+    return None
+
+
+class Profiler:
+    """Records wall time, CPU time, memory delta and payload size of named stages.
+
+    Use one instance per run (e.g. per Streamlit rerun)::
+
+        with profiler.stage("load data") as record:
+            df = load()
+            record["payload"] = df
+
+    Records can be shown with :meth:`frame` and are appended to ``log_path``
+    as JSON lines together with the run id and ``context``.
+    """
+
+    def __init__(self, log_path=DEFAULT_LOG_PATH, **context):
+        self.log_path = log_path
+        self.run_id = uuid.uuid4().hex[:12]
+        self.context = context
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, payload=None):
+        record = {"stage": name, "payload": payload}
+        rss = rss_bytes()
+        cpu = time.process_time()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["wall_ms"] = (time.perf_counter() - started) * 1000
+            record["cpu_ms"] = (time.process_time() - cpu) * 1000
+            record["memory_delta_mb"] = (rss_bytes() - rss) / 2 ** 20
+            size = payload_size(record.pop("payload"))
+            record["payload_mb"] = size / 2 ** 20 if size is not None else None
+            self.records.append(record)
+            if self.log_path:
+                self._log(record)
+
+    def _log(self, record):
+        entry = {"time": time.time(), "run": self.run_id, **self.context, **record}
+        try:
+            with open(self.log_path, "a") as handle:
+                handle.write(json.dumps(entry, default=str) + "\n")
+        except OSError:
+            # Diagnostics must never break the app
+            pass
+
+    def frame(self):
+        """One row per recorded stage, in the order they finished"""
+        columns = ["stage", "wall_ms", "cpu_ms", "memory_delta_mb", "payload_mb"]
+        return pd.DataFrame(self.records, columns=columns)
+
+    @property
+    def total_ms(self):
+        return sum(record["wall_ms"] for record in self.records)
+
+
+def read_log(path):
+    """Profiler log as a DataFrame, for finding slow stages across runs"""
+    return pd.read_json(path, lines=True)
@@ -0,0 +1,134 @@
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import asdict, is_dataclass
+
+import joblib
+import numpy as np
+import pandas as pd
+
+DEFAULT_REGISTRY_DIR = os.environ.get(
+    "COVID_ANALYZER_MODEL_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "covid_analyzer", "models"),
+)
+DEFAULT_KEEP = int(os.environ.get("COVID_ANALYZER_KEEP_MODELS", "10"))
+# zlib level for model files; 0 keeps them uncompressed, which loads fastest
+DEFAULT_COMPRESS = int(os.environ.get("COVID_ANALYZER_MODEL_COMPRESS", "0"))
+
+
+class ModelRegistry:
+    """Versioned on-disk store of trained models.
+
+    Each version is a directory holding the estimator (a joblib file), its
+    feature schema, the held-out labels/predictions as JSON and a small
+    ``meta.json`` with the encoding config, dataset key and metrics. Listing
+    only reads the metadata files, so it stays fast with many versions.
+
+    A forest over hundreds of lineages stores a float64 class distribution per
+    node and can take hundreds of MB on disk; a ``compress`` level shrinks it
+    roughly 50x at the cost of a full decompression on load.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR, keep=DEFAULT_KEEP, compress=DEFAULT_COMPRESS):
+        self.root = root
+        self.keep = keep
+        self.compress = compress
+
+    def _path(self, model_id, name=""):
+        return os.path.join(self.root, model_id, name)
+
+    def save(self, model, schema, dataset_key=None, config=None, metrics=None, evaluation=None, name=None):
+        """Store a new version and apply the retention policy; returns its id"""
+        model_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        tmp_dir = self._path(f".{model_id}.tmp")
+        os.makedirs(tmp_dir)
+        joblib.dump(model, os.path.join(tmp_dir, "model.joblib"), compress=self.compress)
+        with open(os.path.join(tmp_dir, "schema.json"), "w") as handle:
+            json.dump(schema, handle)
+        if evaluation is not None:
+            with open(os.path.join(tmp_dir, "evaluation.json"), "w") as handle:
+                json.dump({key: np.asarray(value).tolist() for key, value in evaluation.items()}, handle)
+        meta = {
+            "id": model_id,
+            "name": name,
+            "created": time.time(),
+            "dataset_key": dataset_key,
+            "config": asdict(config) if is_dataclass(config) else config,
+            "metrics": metrics or {},
+            "estimator": type(model).__name__,
+            "n_features": len(schema.get("feature_names", [])),
+            "n_classes": len(getattr(model, "classes_", [])),
+            "compressed": bool(self.compress),
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as handle:
+            json.dump(meta, handle, default=str)
+        # Publish atomically so readers never see a half-written version
+        os.replace(tmp_dir, self._path(model_id))
+        self.prune(self.keep)
+        return model_id
+
+    def list(self):
+        """All versions, newest first, one row per model"""
+        records = []
+        if os.path.isdir(self.root):
+            for model_id in os.listdir(self.root):
+                if model_id.startswith("."):
+                    # Unfinished save
+                    continue
+                try:
+                    with open(self._path(model_id, "meta.json")) as handle:
+                        meta = json.load(handle)
+                except (OSError, ValueError):
+                    continue
+                records.append({
+                    "id": meta["id"],
+                    "name": meta.get("name"),
+                    "created": pd.Timestamp(meta["created"], unit="s"),
+                    "estimator": meta.get("estimator"),
+                    "n_features": meta.get("n_features"),
+                    "n_classes": meta.get("n_classes"),
+                    **{f"metric_{key}": value for key, value in meta.get("metrics", {}).items()},
+                })
+        frame = pd.DataFrame(records)
+        if frame.empty:
+            return pd.DataFrame(columns=["id", "name", "created", "estimator", "n_features", "n_classes"])
+        return frame.sort_values("created", ascending=False, ignore_index=True)
+
+    def meta(self, model_id):
+        with open(self._path(model_id, "meta.json")) as handle:
+            return json.load(handle)
+
+    def load(self, model_id):
+        """Return ``(model, schema, meta)`` for a saved version"""
+        meta = self.meta(model_id)
+        model = joblib.load(self._path(model_id, "model.joblib"))
+        with open(self._path(model_id, "schema.json")) as handle:
+            schema = json.load(handle)
+        return model, schema, meta
+
+    def load_evaluation(self, model_id):
+        """Held-out labels and predictions saved with the model, or None"""
+        path = self._path(model_id, "evaluation.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as handle:
+            evaluation = json.load(handle)
+        return {key: np.asarray(value, dtype=np.int64 if key == "test_idx" else object)
+                for key, value in evaluation.items()}
+
+    def delete(self, model_id):
+        shutil.rmtree(self._path(model_id), ignore_errors=True)
+
+    def prune(self, keep=None, max_age_days=None):
+        """Delete all but the newest ``keep`` versions and anything older than ``max_age_days``"""
+        versions = self.list()
+        removed = []
+        for position, (model_id, created) in enumerate(zip(versions["id"], versions["created"])):
+            too_many = keep is not None and position >= keep
+            too_old = max_age_days is not None and created < pd.Timestamp.now() - pd.Timedelta(days=max_age_days)
+            if too_many or too_old:
+                self.delete(model_id)
+                removed.append(model_id)
+        return removed
@@ -0,0 +1,34 @@
+from .cleaning import CATEGORICAL, DATE, NUMERIC, STRING
+
+# Column kinds of the NCBI Virus metadata export. Known columns skip inference
+# so eager and chunked loads always agree on the resulting dtypes.
+NCBI_SCHEMA = {
+    "Accession": STRING,
+    "Organism_Name": CATEGORICAL,
+    "GenBank_RefSeq": CATEGORICAL,
+    "Submitters": CATEGORICAL,
+    "Organization": CATEGORICAL,
+    "Org_location": CATEGORICAL,
+    "Release_Date": DATE,
+    "Pangolin": CATEGORICAL,
+    "PangoVersions": CATEGORICAL,
+    "Surveillance_Sampling": CATEGORICAL,
+    "Isolate": STRING,
+    "Species": CATEGORICAL,
+    "Genus": CATEGORICAL,
+    "Family": CATEGORICAL,
+    "Molecule_type": CATEGORICAL,
+    "Length": NUMERIC,
+    "Nuc_Completeness": CATEGORICAL,
+    "Genotype": CATEGORICAL,
+    "Segment": CATEGORICAL,
+    "Publications": CATEGORICAL,
+    "Geo_Location": CATEGORICAL,
+    "Country": CATEGORICAL,
+    "USA": CATEGORICAL,
+    "Host": CATEGORICAL,
+    "Tissue_Specimen_Source": CATEGORICAL,
+    "Collection_Date": DATE,
+    "BioSample": STRING,
+    "BioProject": CATEGORICAL,
+}
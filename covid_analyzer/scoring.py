@@ -0,0 +1,54 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .features import encode_with_schema
+from .ingest import DEFAULT_CHUNKSIZE, iter_clean_chunks
+from .schema import NCBI_SCHEMA
+
+
+def predict_chunk(model, schema, chunk, id_column="Accession", probabilities=True):
+    """Predicted lineage (and optionally every class probability) for one cleaned chunk"""
+    X = encode_with_schema(chunk, schema)
+    proba = model.predict_proba(X)
+    best = proba.argmax(axis=1)
+    result = pd.DataFrame(index=chunk.index)
+    if id_column in chunk.columns:
+        result[id_column] = chunk[id_column].to_numpy()
+    result["predicted_lineage"] = model.classes_[best]
+    result["probability"] = proba[np.arange(len(best)), best]
+    if probabilities:
+        classes = pd.DataFrame(proba, index=chunk.index, columns=[f"p_{label}" for label in model.classes_])
+        result = pd.concat([result, classes], axis=1)
+    return result
+
+
+def score_csv(source, model, schema, output, chunksize=DEFAULT_CHUNKSIZE, nrows=None, id_column="Accession",
+              probabilities=True, progress=None):
+    """Score a metadata CSV chunk by chunk and append the predictions to ``output``.
+
+    Each chunk is cleaned with the same rules as the app, encoded against the
+    training ``schema`` and written out before the next one is read, so memory
+    depends on ``chunksize`` and not on the size of the input. ``progress`` is
+    called as ``progress(rows, seconds)`` after every chunk.
+
+    Returns a dict with the row count, elapsed seconds and rows per second.
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, "w", newline="") as handle:
+            return score_csv(source, model, schema, handle, chunksize, nrows, id_column, probabilities, progress)
+
+    started = time.perf_counter()
+    rows = 0
+    for chunk, _ in iter_clean_chunks(source, chunksize=chunksize, schema=NCBI_SCHEMA, nrows=nrows):
+        predictions = predict_chunk(model, schema, chunk, id_column=id_column, probabilities=probabilities)
+        predictions.to_csv(output, header=rows == 0, index=False)
+        rows += len(chunk)
+        del chunk, predictions
+        if progress is not None:
+            progress(rows, time.perf_counter() - started)
+
+    seconds = time.perf_counter() - started
+    return {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else 0.0}
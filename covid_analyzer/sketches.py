@@ -0,0 +1,100 @@
+"""Mergeable sketches for one-pass column statistics.
+
+Both sketches take a block of *distinct* values (with their counts) at a
+time, so a chunk is reduced with ``value_counts`` first and the sketch work
+depends on the number of distinct values per chunk, not on the rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def hash_values(values):
+    """64-bit hashes of an array of values (strings, numbers or timestamps)"""
+    return pd.util.hash_array(np.asarray(values, dtype=object), categorize=False)
+
+
+def _leading_zeros(values):
+    """Leading zero bits of every uint64, exact up to 53 (larger counts are reported as 64)"""
+    # The top 53 bits convert to float64 exactly; frexp's exponent is their bit length
+    _, bits = np.frexp((values >> np.uint64(11)).astype(np.float64))
+    return np.where(bits > 0, 53 - bits, 64)
+
+
+class HyperLogLog:
+    """Approximate distinct count in ``2 ** precision`` bytes.
+
+    The standard error is about ``1.04 / sqrt(2 ** precision)``, 1.6% at the
+    default precision of 12 (4 KB per column).
+    """
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values):
+        if not len(values):
+            return self
+        hashes = hash_values(values)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = hashes << np.uint64(self.precision)
+        rank = np.minimum(_leading_zeros(rest) + 1, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / empty)
+        return round(estimate)
+
+
+class TopK:
+    """Most frequent values with their counts, keeping at most ``capacity`` candidates.
+
+    Counts of values that stay among the candidates are exact. Once a block
+    pushes the candidate list over capacity the smallest counts are dropped
+    and ``error`` grows by the largest dropped count: any value's true count
+    exceeds its reported count by at most ``error``.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = pd.Series([], dtype=np.int64)
+        self.error = 0
+
+    def add(self, counts):
+        """Add a ``value_counts``-style Series (value -> count)"""
+        counts = counts[counts > 0].sort_values(ascending=False, kind="stable")
+        if not len(counts):
+            return self
+        if len(counts) > self.capacity:
+            # Values that cannot make the candidate list are dropped before aligning
+            self.error += int(counts.iloc[self.capacity])
+            counts = counts.iloc[:self.capacity]
+        # Plain object labels, so blocks with different categories line up
+        counts = pd.Series(counts.to_numpy(dtype=np.int64), index=np.asarray(counts.index, dtype=object))
+        merged = counts if not len(self.counts) else self.counts.add(counts, fill_value=0)
+        if len(merged) > self.capacity:
+            merged = merged.sort_values(ascending=False, kind="stable")
+            self.error += int(merged.iloc[self.capacity])
+            merged = merged.iloc[:self.capacity]
+        self.counts = merged.astype(np.int64)
+        return self
+
+    def merge(self, other):
+        self.add(other.counts)
+        self.error += other.error
+        return self
+
+    def top(self, k=10):
+        """The ``k`` most frequent values as a Series, largest first"""
+        return self.counts.sort_values(ascending=False, kind="stable").iloc[:k]
@@ -0,0 +1,157 @@
+"""One-pass dataset profile: exact numeric statistics plus sketches for text columns.
+
+The profile is accumulated chunk by chunk, so the same code profiles a frame
+in memory or a CSV that is streamed from disk. Numeric columns get exact
+count, mean, standard deviation, minimum and maximum (merged per chunk with
+Chan's formulas); date columns their range; every column an approximate
+distinct count (HyperLogLog); text and categorical columns their most
+frequent values (:class:`~covid_analyzer.sketches.TopK`). Memory is a few KB
+per column whatever the number of rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .ingest import DEFAULT_CHUNKSIZE, iter_clean_chunks
+from .schema import NCBI_SCHEMA
+from .sketches import HyperLogLog, TopK
+
+NUMERIC, DATE, TEXT = "numeric", "date", "text"
+PROFILE_COLUMNS = ["column", "kind", "count", "missing", "missing_%", "distinct", "mean", "std", "min", "max",
+                   "top", "top_count"]
+
+
+def column_kind(series):
+    if pd.api.types.is_bool_dtype(series):
+        return TEXT
+    if pd.api.types.is_numeric_dtype(series):
+        return NUMERIC
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return DATE
+    return TEXT
+
+
+class ColumnProfile:
+    """Running statistics of one column"""
+
+    def __init__(self, name, kind, capacity=1000):
+        self.name = name
+        self.kind = kind
+        self.rows = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.distinct = HyperLogLog()
+        self.top = TopK(capacity) if kind == TEXT else None
+
+    def update(self, series):
+        self.rows += len(series)
+        if self.kind == TEXT:
+            counts = series.value_counts(dropna=True)
+            counts = counts[counts > 0]
+            self.count += int(counts.sum())
+            self.distinct.add(np.asarray(counts.index, dtype=object))
+            self.top.add(counts)
+            return
+
+        if self.kind == DATE:
+            values = series.to_numpy(dtype="datetime64[ns]")
+            values = values[~np.isnat(values)]
+            if len(values):
+                low, high = values.min(), values.max()
+                self.min = low if self.min is None else min(self.min, low)
+                self.max = high if self.max is None else max(self.max, high)
+            self.count += len(values)
+            self.distinct.add(np.unique(values.astype(np.int64)))
+            return
+
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if not n:
+            return
+        mean = values.mean()
+        m2 = float(((values - mean) ** 2).sum())
+        # Chan et al.: combine (count, mean, M2) of the chunk with the running totals
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        low, high = values.min(), values.max()
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.distinct.add(np.unique(values))
+
+    def record(self):
+        missing = self.rows - self.count
+        record = {
+            "column": self.name,
+            "kind": self.kind,
+            "count": self.count,
+            "missing": missing,
+            "missing_%": 100 * missing / self.rows if self.rows else 0.0,
+            "distinct": min(self.distinct.count(), self.count),
+            "mean": None, "std": None, "min": None, "max": None, "top": None, "top_count": None,
+        }
+        if self.kind == NUMERIC and self.count:
+            record.update(mean=self.mean, std=np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan,
+                          min=self.min, max=self.max)
+        elif self.kind == DATE and self.min is not None:
+            record.update(min=pd.Timestamp(self.min), max=pd.Timestamp(self.max))
+        elif self.kind == TEXT and len(self.top.counts):
+            top = self.top.top(1)
+            record.update(top=top.index[0], top_count=int(top.iloc[0]))
+        return record
+
+
+class DatasetProfile:
+    """Column profiles of a dataset, fed one chunk at a time with :meth:`update`"""
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, chunk):
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(col, column_kind(chunk[col]), self.capacity)
+            self.columns[col].update(chunk[col])
+        self.rows += len(chunk)
+        return self
+
+    def frame(self):
+        """One row per column; ``distinct`` is approximate, ``top`` the most frequent text value"""
+        records = [profile.record() for profile in self.columns.values()]
+        frame = pd.DataFrame.from_records(records, columns=PROFILE_COLUMNS)
+        for col in ["mean", "std"]:
+            frame[col] = frame[col].astype(np.float64)
+        for col in ["min", "max", "top"]:
+            frame[col] = frame[col].map(lambda value: None if value is None else str(value))
+        return frame
+
+    def top_values(self, column, k=10):
+        """The ``k`` most frequent values of a text column with their counts"""
+        profile = self.columns[column]
+        if profile.top is None:
+            return pd.Series([], dtype=np.int64, name="count")
+        return profile.top.top(k).rename("count")
+
+
+def profile_frame(df, chunksize=1_000_000, capacity=1000):
+    """Profile an in-memory frame in slices of ``chunksize`` rows"""
+    profile = DatasetProfile(capacity)
+    for start in range(0, max(len(df), 1), chunksize):
+        profile.update(df.iloc[start:start + chunksize])
+    return profile
+
+
+def profile_csv(source, chunksize=DEFAULT_CHUNKSIZE, nrows=None, capacity=1000, schema=NCBI_SCHEMA):
+    """Profile a CSV while streaming it; only one chunk is in memory at a time"""
+    profile = DatasetProfile(capacity)
+    for chunk, _ in iter_clean_chunks(source, chunksize=chunksize, schema=schema, nrows=nrows):
+        profile.update(chunk)
+    return profile
@@ -0,0 +1,241 @@
+"""Synthetic NCBI Virus metadata for benchmarks at production scale.
+
+The generated files have the 28 columns of :data:`~covid_analyzer.schema.NCBI_SCHEMA`
+in export order and formatting. Distinct-value counts grow with the row count
+between what the bundled 2,000-row sample shows and what a full SARS-CoV-2
+export (around 8M records) has, values follow a Zipf-like popularity, and each
+lineage circulates around its own emergence date so time x lineage views look
+like real surveillance data.
+"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from .schema import NCBI_SCHEMA
+
+SAMPLE_ROWS = 2_000
+FULL_ROWS = 8_000_000
+
+# Distinct values at (SAMPLE_ROWS, FULL_ROWS); interpolated on a log-log scale
+CARDINALITY = {
+    "Pangolin": (377, 4_000),
+    "Country": (24, 200),
+    "Submitters": (246, 150_000),
+    "Organization": (151, 5_000),
+    "BioProject": (70, 10_000),
+}
+
+# Share of missing values per column, as seen in the sample export
+MISSING = {
+    "Submitters": 0.24,
+    "Org_location": 0.07,
+    "Surveillance_Sampling": 0.66,
+    "Isolate": 0.5,
+    "Genotype": 1.0,
+    "Segment": 1.0,
+    "Publications": 0.994,
+    "Host": 0.002,
+    "Tissue_Specimen_Source": 0.74,
+    "BioSample": 0.11,
+    "BioProject": 0.09,
+}
+
+CONSTANTS = {
+    "Organism_Name": "Severe acute respiratory syndrome coronavirus 2",
+    "GenBank_RefSeq": "GenBank",
+    "PangoVersions": "4.3.1/1.31/v0.1.12/0.3.19/0.6.2",
+    "Surveillance_Sampling": "TRUE",
+    "Species": "Severe acute respiratory syndrome-related coronavirus",
+    "Genus": "Betacoronavirus",
+    "Family": "Coronaviridae",
+    "Molecule_type": "ssRNA(+)",
+    "Genotype": "Unknown",
+    "Publications": "1",
+    "Host": "Homo sapiens",
+}
+
+COUNTRIES = [
+    "USA", "United Kingdom", "Germany", "Denmark", "Switzerland", "France", "Iceland", "Australia", "Brazil",
+    "Slovakia", "South Africa", "Mexico", "Japan", "China", "Bahrain", "New Zealand", "Kenya", "Pakistan", "India",
+    "Argentina", "Sweden", "Netherlands", "Viet Nam", "Liechtenstein", "Canada", "Spain", "Italy", "Belgium",
+    "Austria", "Norway", "Peru", "Chile", "Israel", "Turkey", "Poland", "Ireland", "Portugal", "Singapore",
+]
+US_STATES = [
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "DC", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS", "KY",
+    "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND", "OH",
+    "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY", "PR",
+]
+TISSUES = ["oronasopharynx", "saliva, oronasopharynx", "swab", "feces"]
+ACCESSION_PREFIXES = ["MW", "MZ", "OK", "OL", "OM", "ON", "OP", "OQ", "OR", "OU", "OV", "PP", "PQ"]
+
+FIRST_DAY = np.datetime64("2020-01-01")
+LAST_DAY = np.datetime64("2025-06-30")
+
+
+def cardinality(col, rows):
+    """Number of distinct values of ``col`` to generate for a file of ``rows`` rows"""
+    low, high = CARDINALITY[col]
+    slope = math.log(high / low) / math.log(FULL_ROWS / SAMPLE_ROWS)
+    return max(1, round(low * (max(rows, 1) / SAMPLE_ROWS) ** slope))
+
+
+def _zipf(count, exponent=1.1):
+    """Popularity weights for ``count`` values, in decreasing order"""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _alias(index):
+    """Two-letter Pango-style alias for the ``index``-th aliased lineage (AA, AB, ...)"""
+    letters = "ABCDEFGHJKLMNPQRSTUVWY"
+    return letters[index // len(letters) % len(letters)] + letters[index % len(letters)]
+
+
+def lineage_names(count, rng):
+    """``count`` hierarchical lineage names (B.1, B.1.1.7, AY.4, BA.2.12.1 ...).
+
+    Children are added under random existing lineages; below three numeric
+    levels the parent gets a two-letter alias, as in the Pango nomenclature.
+    """
+    names = ["B", "B.1"]
+    children = {}
+    aliases = {}
+    while len(names) < count:
+        parent = names[rng.integers(1, len(names))]
+        children[parent] = children.get(parent, 0) + 1
+        if parent.count(".") >= 3:
+            if parent not in aliases:
+                aliases[parent] = _alias(len(aliases) + 20)
+            name = f"{aliases[parent]}.{children[parent]}"
+        else:
+            name = f"{parent}.{children[parent]}"
+        names.append(name)
+    return names[:count]
+
+
+class Vocabulary:
+    """Distinct values and their popularity for one synthetic file"""
+
+    def __init__(self, rows, seed=0):
+        rng = np.random.default_rng(seed)
+        self.pangolin = np.array(lineage_names(cardinality("Pangolin", rows), rng), dtype=object)
+        self.pangolin_weights = rng.permutation(_zipf(len(self.pangolin)))
+        # Later lineages emerge later; each circulates for a few months
+        span = (LAST_DAY - FIRST_DAY).astype(np.int64)
+        order = np.arange(len(self.pangolin)) / max(len(self.pangolin) - 1, 1)
+        self.emergence = (order * span * 0.9 + rng.normal(0, 30, len(order))).astype(np.int64)
+
+        countries = cardinality("Country", rows)
+        extra = [f"Country {i}" for i in range(max(0, countries - len(COUNTRIES)))]
+        self.country = np.array((COUNTRIES + extra)[:countries], dtype=object)
+        self.country_weights = _zipf(countries, exponent=1.6)
+
+        self.submitters = np.array(
+            [f"Lab{i},A., Sequencer{i % 97},B., Analyst{i % 53},C." for i in range(cardinality("Submitters", rows))],
+            dtype=object,
+        )
+        self.organization = np.array(
+            [f"Sequencing Center {i}, Genomics Unit" for i in range(cardinality("Organization", rows))], dtype=object
+        )
+        self.bioproject = np.array(
+            [f"PRJ{'NA' if i % 3 else 'EB'}{600000 + i}" for i in range(cardinality("BioProject", rows))],
+            dtype=object,
+        )
+
+        # dd-mm-yyyy text for every day in range, indexed by day offset
+        days = np.arange(FIRST_DAY, LAST_DAY + np.timedelta64(400, "D"))
+        self.day_text = pd.Series(days).dt.strftime("%d-%m-%Y").to_numpy(dtype=object)
+        self.month_text = pd.Series(days).dt.strftime("%Y-%m").to_numpy(dtype=object)
+        self.year_text = pd.Series(days).dt.strftime("%Y").to_numpy(dtype=object)
+
+
+def _pick(values, weights, size, rng):
+    return values[rng.choice(len(values), size=size, p=weights)]
+
+
+def _missing(values, col, rng):
+    share = MISSING.get(col, 0.0)
+    if share:
+        values = values.copy()
+        values[rng.random(len(values)) < share] = None
+    return values
+
+
+def generate_chunk(vocab, rows, start=0, seed=0):
+    """``rows`` synthetic records (as text, like a raw export) starting at record number ``start``"""
+    rng = np.random.default_rng([seed, start])
+    ids = np.arange(start, start + rows)
+    span = len(vocab.day_text) - 400
+
+    lineage = rng.choice(len(vocab.pangolin), size=rows, p=vocab.pangolin_weights)
+    collected = np.clip(vocab.emergence[lineage] + rng.normal(0, 45, rows).astype(np.int64), 0, span - 1)
+    released = np.minimum(collected + rng.exponential(60, rows).astype(np.int64) + 3, len(vocab.day_text) - 1)
+    collection_text = vocab.day_text[collected]
+    precision = rng.random(rows)
+    collection_text = np.where(precision < 0.007, vocab.month_text[collected], collection_text)
+    collection_text = np.where((precision >= 0.007) & (precision < 0.013), vocab.year_text[collected],
+                               collection_text)
+
+    country = _pick(vocab.country, vocab.country_weights, rows, rng)
+    is_usa = country == "USA"
+    state = np.where(is_usa, np.array(US_STATES, dtype=object)[rng.integers(0, len(US_STATES), rows)], None)
+    geo = np.where(is_usa, "USA: " + state.astype(str), country)
+
+    length = np.clip(rng.normal(29_820, 60, rows), 29_000, 29_903).astype(np.int64)
+    partial = rng.random(rows) < 0.3
+    length[partial] -= rng.integers(0, 400, partial.sum())
+
+    prefixes = np.array(ACCESSION_PREFIXES, dtype=object)[ids % len(ACCESSION_PREFIXES)]
+    numbers = pd.Series(ids // len(ACCESSION_PREFIXES)).astype(str).str.zfill(6).to_numpy(dtype=object)
+    accession = prefixes + numbers
+
+    columns = {
+        "Accession": accession,
+        "Submitters": _pick(vocab.submitters, _zipf(len(vocab.submitters)), rows, rng),
+        "Organization": _pick(vocab.organization, _zipf(len(vocab.organization)), rows, rng),
+        "Org_location": country.copy(),
+        "Release_Date": vocab.day_text[released],
+        "Pangolin": vocab.pangolin[lineage],
+        "Isolate": "ISO-" + pd.Series(ids).astype(str).to_numpy(dtype=object),
+        "Length": length,
+        "Nuc_Completeness": np.where(length >= 29_700, "complete", "partial"),
+        "Geo_Location": geo,
+        "Country": country,
+        "USA": state,
+        "Tissue_Specimen_Source": np.array(TISSUES, dtype=object)[
+            rng.choice(len(TISSUES), size=rows, p=[0.96, 0.02, 0.015, 0.005])
+        ],
+        "Collection_Date": collection_text,
+        "BioSample": "SAMN" + pd.Series(30_000_000 + ids).astype(str).to_numpy(dtype=object),
+        "BioProject": _pick(vocab.bioproject, _zipf(len(vocab.bioproject)), rows, rng),
+    }
+    frame = {}
+    for col in NCBI_SCHEMA:
+        if col in columns:
+            values = columns[col]
+        else:
+            values = np.full(rows, CONSTANTS.get(col), dtype=object)
+        if col in MISSING:
+            values = _missing(np.asarray(values, dtype=object), col, rng)
+        frame[col] = values
+    return pd.DataFrame(frame)
+
+
+def generate_dataset(rows, seed=0):
+    """A synthetic export of ``rows`` records as an in-memory (text) DataFrame"""
+    return generate_chunk(Vocabulary(rows, seed), rows, seed=seed)
+
+
+def write_dataset(path, rows, seed=0, chunksize=500_000):
+    """Write a synthetic export of ``rows`` records to CSV without holding it in memory"""
+    vocab = Vocabulary(rows, seed)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="") as handle:
+        for start in range(0, rows, chunksize):
+            chunk = generate_chunk(vocab, min(chunksize, rows - start), start=start, seed=seed)
+            chunk.to_csv(handle, header=start == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
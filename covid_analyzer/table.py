@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def sort_order(series, ascending=True):
+    """Row positions that sort ``series``, missing values last.
+
+    Categorical columns are ordered by their labels through the codes, so only
+    the distinct values are ever compared as strings.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        rank = np.empty(len(categories) + 1, dtype=np.int64)
+        rank[:-1] = np.argsort(np.argsort(categories.astype(str), kind="stable"), kind="stable")
+        rank[-1] = len(categories)  # missing (code -1) sorts last
+        keys = rank[series.cat.codes.to_numpy()]
+        missing = keys == len(categories)
+    else:
+        keys = series.to_numpy()
+        missing = series.isna().to_numpy()
+    valid = np.flatnonzero(~missing)
+    order = valid[np.argsort(keys[valid], kind="stable")]
+    if not ascending:
+        order = order[::-1]
+    return np.concatenate([order, np.flatnonzero(missing)])
+
+
+def filter_mask(series, value):
+    """Boolean mask of rows matching ``value``.
+
+    ``value`` is a ``(low, high)`` pair for numeric and date columns (either
+    end may be None) and a case-insensitive substring for text columns.
+    Categorical columns test the substring on their categories only.
+    """
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+        low, high = value
+        mask = series.notna().to_numpy().copy()
+        if low is not None:
+            mask &= (series >= low).to_numpy(dtype=bool, na_value=False)
+        if high is not None:
+            mask &= (series <= high).to_numpy(dtype=bool, na_value=False)
+        return mask
+    text = str(value).lower()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        hits = series.cat.categories.astype(str).str.lower().str.contains(text, regex=False)
+        lookup = np.append(np.asarray(hits, dtype=bool), False)
+        return lookup[series.cat.codes.to_numpy()]
+    return series.astype("string").str.lower().str.contains(text, regex=False).to_numpy(dtype=bool, na_value=False)
+
+
+class TableView:
+    """Sorted and filtered row positions over a frame that stays on the server.
+
+    Sort orders and filter masks are computed once per column (and filter
+    value) and cached, so paging through the result only slices the visible
+    rows: the cost of a page does not depend on the size of the frame.
+    One view is shared by all sessions of the app, hence the lock.
+    """
+
+    def __init__(self, df, max_cached=16):
+        self.df = df
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key, compute):
+        with self._lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+                return value
+        value = compute()
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return value
+
+    def positions(self, sort=None, ascending=True, filters=None):
+        """Row positions after applying ``filters`` ({column: value}) and sorting by ``sort``"""
+        filters = {col: value for col, value in (filters or {}).items() if value not in (None, "", (None, None))}
+        mask = None
+        for col, value in sorted(filters.items(), key=lambda item: item[0]):
+            col_mask = self._cached(("filter", col, repr(value)), lambda col=col, value=value: filter_mask(self.df[col], value))
+            mask = col_mask if mask is None else mask & col_mask
+        if sort is None:
+            return np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+        order = self._cached(("sort", sort, ascending), lambda: sort_order(self.df[sort], ascending))
+        return order if mask is None else order[mask[order]]
+
+    def page(self, positions, page=1, page_size=100):
+        """Rows of page ``page`` (1-based) of ``positions`` as a small frame"""
+        start = max(page - 1, 0) * page_size
+        return self.df.iloc[positions[start:start + page_size]]
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import GroupKFold, StratifiedKFold
+
+# How lineages with fewer rows than folds are handled during cross-validation
+MERGE = "merge"
+DROP = "drop"
+GROUP = "group"
+RARE = "__rare__"
+
+
+def train_forest(X, y, n_estimators=100, batch_size=10, n_jobs=-1, time_budget=None, random_state=42,
+                 oob_score=True, progress=None, **params):
+    """Fit a Random Forest in batches of trees on all cores.
+
+    Trees are added ``batch_size`` at a time with ``warm_start`` so the caller
+    sees progress after every batch. Out-of-bag accuracy is recomputed over
+    all trees each time, so it is only evaluated when the forest has doubled
+    in size and after the last batch; in between ``oob_score`` is None. This
+    keeps the OOB work within about twice that of a single final estimate.
+    When ``time_budget`` (seconds) runs out, growth stops and the forest
+    built so far is returned. ``progress`` is called as
+    ``progress(trees, n_estimators, oob_score, elapsed)``.
+
+    Returns ``(model, history)`` where ``history`` lists one dict per batch.
+    """
+    if sparse.issparse(X):
+        # Trees are grown on CSC; convert once rather than on every batch
+        X = X.tocsc()
+
+    model = RandomForestClassifier(
+        n_estimators=0,
+        warm_start=True,
+        n_jobs=n_jobs,
+        oob_score=False,
+        random_state=random_state,
+        **params,
+    )
+    history = []
+    started = time.perf_counter()
+    next_oob = batch_size
+    last_batch = 0.0
+    while model.n_estimators < n_estimators:
+        model.n_estimators = min(model.n_estimators + batch_size, n_estimators)
+        before = time.perf_counter() - started
+        final = model.n_estimators >= n_estimators or bool(time_budget and before + last_batch >= time_budget)
+        # sklearn scores every tree again on each OOB fit, so only do it at checkpoints
+        model.oob_score = oob_score and (model.n_estimators >= next_oob or final)
+        with warnings.catch_warnings():
+            # Early batches leave some rows without out-of-bag trees
+            warnings.simplefilter("ignore", UserWarning)
+            model.fit(X, y)
+        elapsed = time.perf_counter() - started
+        last_batch = elapsed - before
+        oob = None
+        if model.oob_score:
+            oob = model.oob_score_
+            next_oob = 2 * model.n_estimators
+        history.append({"trees": model.n_estimators, "oob_score": oob, "seconds": elapsed})
+        if progress is not None:
+            progress(model.n_estimators, n_estimators, oob, elapsed)
+        if time_budget and elapsed >= time_budget:
+            break
+    return model, history
+
+
+def cv_folds(y, n_splits=5, strategy=MERGE, groups=None, random_state=42):
+    """Build cross-validation folds that survive rare lineages.
+
+    ``merge`` relabels lineages with fewer than ``n_splits`` rows as one
+    ``__rare__`` class before stratifying, ``drop`` leaves them out, and
+    ``group`` uses GroupKFold over ``groups`` (e.g. BioProject) so no group
+    appears on both sides of a fold.
+
+    Returns ``(positions, labels, folds)``: the row positions taking part,
+    their (possibly relabeled) targets, and a list of ``(train, test)``
+    index arrays into ``positions``.
+    """
+    labels = pd.Series(np.asarray(y, dtype=object))
+    positions = np.arange(len(labels))
+    counts = labels.map(labels.value_counts())
+    rare = (counts < n_splits).to_numpy()
+
+    if strategy == GROUP:
+        if groups is None:
+            raise ValueError("Grouped folds need a group column")
+        groups = pd.Series(groups).astype(object).fillna("__missing__").to_numpy()
+        folds = list(GroupKFold(n_splits=n_splits).split(positions, labels, groups))
+        return positions, labels.to_numpy(), folds
+
+    if strategy == DROP:
+        positions = positions[~rare]
+        labels = labels[~rare]
+    else:
+        labels = labels.where(~rare, RARE)
+
+    with warnings.catch_warnings():
+        # A merged rare class smaller than n_splits only triggers a warning
+        warnings.simplefilter("ignore", UserWarning)
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        folds = list(splitter.split(positions, labels))
+    return positions, labels.to_numpy(), folds
+
+
+def _fold_key(data_key, params, n_splits, fold_scheme, random_state, fold):
+    payload = json.dumps([data_key, params, n_splits, fold_scheme, random_state, fold], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _fit_fold(X, labels, train, test, params):
+    started = time.perf_counter()
+    model = RandomForestClassifier(**params)
+    model.fit(X[train], labels[train])
+    score = float((model.predict(X[test]) == labels[test]).mean())
+    return {"score": score, "train_rows": len(train), "test_rows": len(test),
+            "seconds": time.perf_counter() - started}
+
+
+def cross_validate_forest(X, y, n_splits=5, strategy=MERGE, groups=None, random_state=42, n_jobs=-1,
+                          data_key=None, cache_dir=None, **params):
+    """Cross-validate a Random Forest with folds fitted in parallel processes.
+
+    Folds run on a process pool; large arrays (including the buffers of a
+    sparse matrix) are memory-mapped by joblib, so workers share the feature
+    matrix instead of receiving copies. When ``data_key`` and ``cache_dir``
+    are given, each fold's result is stored under (data, params, fold seed)
+    and reused on the next run.
+
+    Returns a DataFrame with one row per fold.
+    """
+    positions, labels, folds = cv_folds(y, n_splits, strategy, groups, random_state)
+    if sparse.issparse(X):
+        X = X.tocsr()
+    if len(positions) < X.shape[0]:
+        X = X[positions]
+
+    cores = os.cpu_count() or 1
+    workers = min(len(folds), cores) if n_jobs == -1 else max(1, min(n_jobs, len(folds)))
+    params = {"n_estimators": 100, "random_state": random_state, **params,
+              "n_jobs": max(1, cores // workers)}
+
+    results = [None] * len(folds)
+    keys = [None] * len(folds)
+    if data_key is not None and cache_dir is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as e:
+            warnings.warn(f"Fold cache disabled, cannot create {cache_dir}: {e}")
+            cache_dir = None
+    if data_key is not None and cache_dir is not None:
+        model_params = {k: v for k, v in params.items() if k != "n_jobs"}
+        fold_scheme = strategy
+        if strategy == GROUP:
+            # Different group columns give different folds
+            fold_scheme = f"{GROUP}:{pd.util.hash_pandas_object(pd.Series(groups, dtype=object), index=False).sum()}"
+        for i in range(len(folds)):
+            keys[i] = _fold_key(data_key, model_params, n_splits, fold_scheme, random_state, i)
+            try:
+                with open(os.path.join(cache_dir, f"{keys[i]}.json")) as handle:
+                    results[i] = {**json.load(handle), "cached": True}
+            except (OSError, ValueError):
+                pass
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        fitted = Parallel(n_jobs=workers, backend="loky", max_nbytes="1M", mmap_mode="r")(
+            delayed(_fit_fold)(X, labels, folds[i][0], folds[i][1], params) for i in pending
+        )
+        for i, result in zip(pending, fitted):
+            results[i] = {**result, "cached": False}
+            if keys[i] is not None:
+                try:
+                    with open(os.path.join(cache_dir, f"{keys[i]}.json"), "w") as handle:
+                        json.dump(result, handle)
+                except OSError as e:
+                    # Results are returned either way; the cache only saves a rerun
+                    warnings.warn(f"Could not write the fold cache in {cache_dir}: {e}")
+
+    return pd.DataFrame([{"fold": i + 1, **result} for i, result in enumerate(results)])